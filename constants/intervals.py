@@ -0,0 +1,39 @@
+# candle intervals of the candles_snapshot API, in milliseconds
+MINUTE_MS = 1000 * 60
+
+INTERVAL_MS = {
+    '1m': MINUTE_MS,
+    '3m': MINUTE_MS * 3,
+    '5m': MINUTE_MS * 5,
+    '15m': MINUTE_MS * 15,
+    '30m': MINUTE_MS * 30,
+    '1h': MINUTE_MS * 60,
+    '2h': MINUTE_MS * 60 * 2,
+    '4h': MINUTE_MS * 60 * 4,
+    '8h': MINUTE_MS * 60 * 8,
+    '12h': MINUTE_MS * 60 * 12,
+    '1d': MINUTE_MS * 60 * 24,
+    '3d': MINUTE_MS * 60 * 24 * 3,
+    '1w': MINUTE_MS * 60 * 24 * 7,
+}
+
+
+def interval_ms(interval):
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Invalid interval: {interval}")
+    return INTERVAL_MS[interval]
+
+
+# bar open times are multiples of the interval since the epoch, except
+# weeks, which open on Monday 00:00 UTC (the epoch was a Thursday).
+# Align bars with bar_open only, so this stays the one place deciding it.
+INTERVAL_OFFSET_MS = {
+    '1w': MINUTE_MS * 60 * 24 * 4,
+}
+
+
+def bar_open(t, interval):
+    """Open time of the interval bar containing t (ms, int or int64 array)."""
+    step = interval_ms(interval)
+    offset = INTERVAL_OFFSET_MS.get(interval, 0)
+    return (t - offset) // step * step + offset
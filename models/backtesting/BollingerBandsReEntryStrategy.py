@@ -2,6 +2,9 @@ from .strategy import Strategy, Action
 from .backtesting import TRADE_DATA_COLS
 from .portfolio import Portfolio, Transaction
 from .marginPosition import MarginPosition
+from .recorder import ColumnarRecorder
+from .snapshot import BarSnapshot
+from models.indicators import StreamingBollingerBands, indicator
 from enum import Enum
 import numpy as np
 import pandas as pd
@@ -23,39 +26,29 @@ def calculate_bollinger_bands(data, window=20, k=2):
     return data[["close", "Middle Band", "Upper Band", "Lower Band"]]
 
 
-def update_bollinger_bands_efficiently(data, window=20, k=2):
-    """Update Bollinger Bands only for new data, where they haven't been calculated."""
-    # Create a mask for rows that need Bollinger Band calculations
-    data = data.copy()
-    prep_col = [
-        "Middle Band",
-    ]
-    for col in prep_col:
-        if col not in data.columns:
-            data[col] = np.nan
-    mask = data["Middle Band"].isna()
-
-    # Calculate for missing entries only
-    if mask.any():
-        # Calculate the Middle Band using a rolling window
-        data.loc[mask, "Middle Band"] = (
-            data["close"].rolling(window=window).mean()[mask]
-        )
-
-        # Calculate rolling standard deviation on the fly for the rows that are masked
-        data.loc[mask, "close_std"] = rolling_std = (
-            data["close"].rolling(window=window).std()
-        )
-
-        # Update only where needed
-        data.loc[mask, "Upper Band"] = (
-            data.loc[mask, "Middle Band"] + (rolling_std * k)[mask]
-        )
-        data.loc[mask, "Lower Band"] = (
-            data.loc[mask, "Middle Band"] - (rolling_std * k)[mask]
-        )
-
-    return data
+DATA_DTYPES = {
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+    "symbol": object,
+    "datetime": "datetime64[ns]",
+    "interval": object,
+    "Middle Band": "float64",
+    "Upper Band": "float64",
+    "Lower Band": "float64",
+    "close_std": "float64",
+    "state": object,
+}
+
+HISTORY_DTYPES = {
+    "datetime": "datetime64[ns]",
+    "symbol": object,
+    "action": object,
+    "price": "float64",
+    "quantity": "float64",
+}
 
 
 class BollingerBandsState(Enum):
@@ -66,6 +59,43 @@ class BollingerBandsState(Enum):
     WITHIN_BANDS = 3
 
 
+# state codes used by the vectorized mode, 0 while the bands are warming up
+NO_BAND_STATE = 0
+STATE_BY_CODE = np.array(
+    [np.nan, *(state for state in BollingerBandsState)], dtype=object
+)
+
+
+def calculate_band_states(close, window=20, k=2):
+    """
+    Calculate Bollinger Bands and the band state of every close in one pass.
+    Returns middle, upper, lower, std and the state codes (BollingerBandsState values).
+    """
+    close = pd.Series(close, dtype="float64").to_numpy()
+    # shared with the other runs over the same closes, e.g. of a k sweep
+    middle, upper, lower, std = indicator("bollinger", close, window=window, k=k)
+
+    state = np.full(len(close), BollingerBandsState.WITHIN_BANDS.value, dtype=np.int8)
+    state[close > upper] = BollingerBandsState.ABOVE_UPPER_BAND.value
+    state[close < lower] = BollingerBandsState.BELOW_LOWER_BAND.value
+    state[np.isnan(middle)] = NO_BAND_STATE
+    return middle, upper, lower, std, state
+
+
+def find_reentry_signals(state):
+    """
+    Find the OUTSIDE -> WITHIN transitions of the state codes.
+    Returns +1 where the close re-enters from below (long), -1 where it
+    re-enters from above (short) and 0 elsewhere.
+    """
+    signal = np.zeros(len(state), dtype=np.int8)
+    previous, current = state[:-1], state[1:]
+    reentry = current == BollingerBandsState.WITHIN_BANDS.value
+    signal[1:][reentry & (previous == BollingerBandsState.BELOW_LOWER_BAND.value)] = 1
+    signal[1:][reentry & (previous == BollingerBandsState.ABOVE_UPPER_BAND.value)] = -1
+    return signal
+
+
 class BollingerBandsReEntryStrategy(Strategy):
     # BUY_QUANTITY = 0.0001
     INITIAL_CAPITAL = 200
@@ -106,80 +136,134 @@ class BollingerBandsReEntryStrategy(Strategy):
         leverage=None,
         k=None,
         stop_loss_percentage=None,
+        backend="decimal",
+        sz_decimals=None,
     ):
+        """
+        backend, sz_decimals: numeric backend of the portfolio, see Portfolio
+        """
         self._initial_capital = initial_capital
         self._buy_equity = buy_equity
         self._leverage = leverage
         self._k = k
         self._stop_loss_percentage = stop_loss_percentage
 
-        self.data = pd.DataFrame(
-            columns=[
-                *TRADE_DATA_COLS,
-                # "close",
-                "Middle Band",
-                "Upper Band",
-                "Lower Band",
-            ]
-        )
-        self.history = pd.DataFrame(
-            columns=[
-                "datetime",
-                "symbol",
-                "action",
-                "price",
-                "quantity",
-            ]
-        )
+        self._data = ColumnarRecorder(DATA_DTYPES.keys(), dtypes=DATA_DTYPES)
+        self._history = ColumnarRecorder(HISTORY_DTYPES.keys(), dtypes=HISTORY_DTYPES)
         self.portfolio = Portfolio(
             initial_capital=self.initial_capital,
+            backend=backend,
+            sz_decimals=sz_decimals,
         )
+        self.bands = StreamingBollingerBands(window=20, k=self.k)
 
     counter = 0
 
+    @property
+    def data(self):
+        """The bars seen so far, with their bands and state."""
+        return self._data.to_df()
+
+    @property
+    def history(self):
+        """The actions taken so far."""
+        return self._history.to_df()
+
     def run(self, current_data, historical_data):
         """Run the Bollinger Bands Re-Entry Strategy."""
-        # handle the case where the current data is a series
-        if isinstance(current_data, pd.Series):
-            current_data = pd.DataFrame([current_data])
-        for col in self.data.columns:
-            if col not in current_data.columns:
-                current_data[col] = np.nan
-        current_data = current_data[self.data.columns]
-
-        # Combine the current and historical data
-        try:
-            # print("-------- current data --------")
-            # print(current_data, type(current_data))
-            # print(self.data, type(self.data))
-            self.data = pd.concat([self.data, current_data], axis=0, ignore_index=True)
-            # print("-------- merged data --------")
-            # print(self.data, type(self.data))
+        # handle the case where the current data is a frame
+        if isinstance(current_data, pd.DataFrame):
+            current_data = current_data.iloc[-1]
+        self._step({col: current_data[col] for col in TRADE_DATA_COLS})
 
-            # Update the Bollinger Bands
-            self.data = update_bollinger_bands_efficiently(self.data, k=2)
+    def run_bar(self, cursor):
+        """Run the Bollinger Bands Re-Entry Strategy on the array engine."""
+        self._step({col: cursor[col] for col in TRADE_DATA_COLS})
+
+    def _step(self, row):
+        try:
+            # Update the Bollinger Bands with the new close only
+            middle, upper, lower = self.bands.update(row["close"])
+            row["Middle Band"] = middle
+            row["Upper Band"] = upper
+            row["Lower Band"] = lower
+            row["close_std"] = self.bands.std
 
             # Check the state of the Bollinger Bands
-            self.data["state"] = self.data.apply(self.check_state, axis=1)
+            row["state"] = self.check_state(row)
+            self._data.append(row)
 
             # Execute trades based on the state
             self.execute_trades()
-            history = self.portfolio.check_portfolio_state(current_data)
-            if history is not None and history.shape[0] > 0:
-                self.history = pd.concat([self.history, history], ignore_index=True)
-            self.portfolio.evaluate_portfolio(current_data)
+            snapshot = BarSnapshot.from_prices(
+                row["datetime"],
+                {row["symbol"]: (row["open"], row["high"], row["low"], row["close"])},
+                self.portfolio.symbols,
+            )
+            self._history.extend(self.portfolio.stop_loss(snapshot))
+            self.portfolio.record(snapshot)
             if self.verbose:
                 print(
                     "Portfolio Value: ",
-                    self.portfolio.portfolio_history.shape,
+                    len(self.portfolio.recorder),
                     ":",
-                    self.portfolio.portfolio_history[-1:]["close"].values[0],
+                    self.portfolio.recorder.last("close"),
                 )
         except Exception as e:
             print(e)
             print("Error in running the Bollinger Bands Re-Entry Strategy.")
             raise e
 
+    def run_batch(self, data):
+        """
+        Run the Bollinger Bands Re-Entry Strategy over the whole data at once.
+        Bands, states and re-entry signals are computed in one vectorized pass,
+        then the portfolio ledger is swept once over the bars.
+        """
+        data = data.reset_index(drop=True)
+        middle, upper, lower, std, state = calculate_band_states(data["close"], k=self.k)
+        signal = find_reentry_signals(state)
+
+        self._data.extend(
+            {
+                **{col: data[col].to_numpy() for col in TRADE_DATA_COLS},
+                "Middle Band": middle,
+                "Upper Band": upper,
+                "Lower Band": lower,
+                "close_std": std,
+                "state": STATE_BY_CODE[state],
+            }
+        )
+
+        symbols = data["symbol"].to_numpy()
+        datetimes = data["datetime"].to_numpy()
+        opens = data["open"].to_numpy()
+        highs = data["high"].to_numpy()
+        lows = data["low"].to_numpy()
+        closes = data["close"].to_numpy()
+
+        for i in range(len(data)):
+            if signal[i] != 0:
+                row = {
+                    "symbol": symbols[i],
+                    "close": closes[i],
+                    "datetime": datetimes[i],
+                }
+                if signal[i] > 0:
+                    self.long(row)
+                else:
+                    self.short(row)
+                if self.verbose:
+                    print("Bought at: " if signal[i] > 0 else "Sold at: ", closes[i])
+
+            snapshot = BarSnapshot.from_prices(
+                datetimes[i],
+                {symbols[i]: (opens[i], highs[i], lows[i], closes[i])},
+                self.portfolio.symbols,
+            )
+            self._history.extend(self.portfolio.stop_loss(snapshot))
+            self.portfolio.record(snapshot)
+
     def check_state(self, row):
         """Check the state of the Bollinger Bands."""
         if pd.isna(row["Middle Band"]):
@@ -196,14 +280,14 @@ class BollingerBandsReEntryStrategy(Strategy):
         """Execute trades based on the transition of the Bollinger Bands state."""
         # Check if there's enough data to compare current and previous states
 
-        if len(self.data) > 1:
-            current_row = self.data.iloc[-1]
-            previous_row = self.data.iloc[-2]
+        if len(self._data) > 1:
+            current_row = self._data.row(-1)
+            previous_row = self._data.row(-2)
 
             if self.verbose:
                 print(
-                    "shape(self.data): ",
-                    self.data.shape,
+                    "len(self.data): ",
+                    len(self._data),
                     "states: ",
                     current_row["state"],
                     previous_row["state"],
@@ -243,21 +327,14 @@ class BollingerBandsReEntryStrategy(Strategy):
         else:
             history_action = Action.MISSED_LONG
 
-        self.history = pd.concat(
-            [
-                self.history,
-                pd.DataFrame(
-                    {
-                        "datetime": row["datetime"],
-                        "symbol": row["symbol"],
-                        "action": history_action,
-                        "price": row["close"],
-                        "quantity": position.size,
-                    },
-                    index=[0],
-                ),
-            ],
-            ignore_index=True,
+        self._history.append(
+            {
+                "datetime": row["datetime"],
+                "symbol": row["symbol"],
+                "action": history_action,
+                "price": row["close"],
+                "quantity": position.quantity,
+            }
         )
 
     def short(self, row):
@@ -279,21 +356,14 @@ class BollingerBandsReEntryStrategy(Strategy):
         else:
             history_action = Action.MISSED_SHORT
 
-        self.history = pd.concat(
-            [
-                self.history,
-                pd.DataFrame(
-                    {
-                        "datetime": row["datetime"],
-                        "symbol": row["symbol"],
-                        "action": history_action,
-                        "price": row["close"],
-                        "quantity": position.size,
-                    },
-                    index=[0],
-                ),
-            ],
-            ignore_index=True,
+        self._history.append(
+            {
+                "datetime": row["datetime"],
+                "symbol": row["symbol"],
+                "action": history_action,
+                "price": row["close"],
+                "quantity": position.quantity,
+            }
         )
 
     def end(self):
@@ -1,5 +1,6 @@
 import pandas as pd
 import pprint 
+from .bars import BarArrays
 
 TRADE_DATA_COLS = [
     "open",
@@ -46,6 +47,8 @@ class BackTesting:
     This class is for backtesting trading strategies
     """
 
+    MODES = ("iterrows", "array", "vectorized")
+
     def __init__(
         self,
         verbose=True,
@@ -54,28 +57,59 @@ class BackTesting:
         self.strategy = None
 
     @validate_data
-    def run_backtesting(self, data, strategy=None, play_mode=False):
+    def run_backtesting(self, data, strategy=None, play_mode=False, mode="iterrows"):
+        """
+        mode="iterrows": feed strategy.run(row, data.iloc[0:i, :]) row by row
+        mode="array": pull the columns into numpy arrays once and feed
+            strategy.run_bar(cursor), without per-bar copies
+        mode="vectorized": hand the whole data to strategy.run_batch(data)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid mode: {mode}, expected one of {self.MODES}")
         if self.verbose:
             print("Start Running backtesting...")
             print(f"Data shape: {data.shape}")
             print(f"Strategy: {strategy}")
 
         self.strategy = strategy
+        if mode == "vectorized":
+            self.strategy.run_batch(data)
+            self.strategy.end()
+        elif mode == "array":
+            self._run_array(data, play_mode=play_mode)
+        else:
+            self._run_iterrows(data, play_mode=play_mode)
+
+        if self.verbose:
+            print("Backtesting complete.")
+
+    def _run_iterrows(self, data, play_mode=False):
         for i, row in data.iterrows():
             if self.verbose:
                 print(f"Processing row {i}...")
             self.strategy.run(row, data.iloc[0:i, :])
 
             if play_mode:
-                print(row["close"])
-                print(self.strategy.portfolio.cash)
-                pprint.pprint(self.strategy.portfolio.holdings)
+                self._pause(row["close"])
+        else:
+            self.strategy.end()
+
+    def _run_array(self, data, play_mode=False):
+        bars = BarArrays.from_df(data)
+        for cursor in bars.cursor():
+            if self.verbose:
+                print(f"Processing bar {cursor.index}...")
+            self.strategy.run_bar(cursor)
 
-                input("Press Enter to continue to the next step...")  # Pause execution
+            if play_mode:
+                self._pause(cursor["close"])
         else:
             self.strategy.end()
 
+    def _pause(self, close):
+        print(close)
+        print(self.strategy.portfolio.cash)
+        pprint.pprint(self.strategy.portfolio.holdings)
 
-        if self.verbose:
-            print("Backtesting complete.")
+        input("Press Enter to continue to the next step...")  # Pause execution
 
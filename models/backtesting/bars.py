@@ -0,0 +1,79 @@
+import pandas as pd
+
+
+class BarArrays:
+    """
+    Column arrays of a candle DataFrame, pulled out once for the array engine.
+
+    Every column of the frame is kept as a read-only numpy array, so the
+    windows handed to strategies are views and never copies.
+    """
+
+    def __init__(self, columns: dict, frame: pd.DataFrame = None):
+        self.columns = columns
+        self.frame = frame
+        self.length = len(next(iter(columns.values()))) if columns else 0
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame):
+        columns = {}
+        for col in df.columns:
+            values = df[col].to_numpy()
+            values.flags.writeable = False
+            columns[col] = values
+        return cls(columns, frame=df)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def cursor(self):
+        """Iterate over the bars, yielding the same cursor moved forward each time."""
+        cursor = BarCursor(self)
+        for i in range(self.length):
+            cursor.index = i
+            yield cursor
+
+
+class BarCursor:
+    """
+    Position of the array engine within a BarArrays.
+
+    The cursor is mutated in place as the engine advances, so strategies must
+    not hold on to it between bars; copy the scalars they need instead.
+    """
+
+    def __init__(self, bars: BarArrays, index=0):
+        self.bars = bars
+        self.index = index
+
+    def __getitem__(self, column):
+        """Value of `column` at the current bar."""
+        return self.bars.columns[column][self.index]
+
+    def __len__(self):
+        """Number of bars seen so far, current bar included."""
+        return self.index + 1
+
+    def window(self, column, length=None):
+        """View of the last `length` values of `column`, current bar included."""
+        end = self.index + 1
+        start = 0 if length is None else max(0, end - length)
+        return self.bars.columns[column][start:end]
+
+    def history(self, column, length=None):
+        """View of the last `length` values of `column` before the current bar."""
+        end = self.index
+        start = 0 if length is None else max(0, end - length)
+        return self.bars.columns[column][start:end]
+
+    ########## legacy adapter ##########
+    def current_row(self):
+        """The current bar as a Series, as `iterrows` would yield it."""
+        return self.bars.frame.iloc[self.index]
+
+    def historical_data(self):
+        """All bars before the current one, as the legacy engine sliced them."""
+        return self.bars.frame.iloc[0 : self.index, :]
@@ -1,5 +1,6 @@
 from decimal import Decimal
 from enum import Enum
+from .numeric import DECIMAL
 
 
 class MarginPosition:
@@ -18,19 +19,30 @@ class MarginPosition:
         side,
         leverage=1.0,
         stop_loss_percentage=0,
+        backend=DECIMAL,
     ):
+        """
+        backend: the numeric backend (see numeric.py) holding the prices,
+        size and amounts of the position, Decimal by default
+        """
+        self.backend = backend
         self.symbol = symbol
-        self.entry_price = Decimal(entry_price)
-        self.equity = Decimal(equity)
+        self.entry_price = backend.price(entry_price)
+        self.equity = backend.amount(equity)
         self.side = side
-        self.leverage = Decimal(leverage)
-        self.size = (
-            self.equity * self.leverage / self.entry_price
+        self.leverage = backend.ratio(leverage)
+        self.size = backend.size(
+            self.equity, self.leverage, self.entry_price
         )  # Number of units bought
-        self.stop_loss_percentage = Decimal(stop_loss_percentage)
+        self.stop_loss_percentage = backend.ratio(stop_loss_percentage)
+
+    @property
+    def quantity(self):
+        """Number of units bought, as a float."""
+        return self.backend.size_float(self.size)
 
     def pnl(self, current_price):
-        current_price = Decimal(current_price)
+        current_price = self.backend.price(current_price)
         if self.side == self.Side.LONG:
             return (current_price - self.entry_price) * self.size
         else:  # SHORT position
@@ -64,9 +76,10 @@ class MarginPosition:
         return self.equity + self.pnl(current_price)
 
     def should_stop_loss(self, current_price):
-        return (
-            self.position_evaluation(current_price=current_price) / self.equity
-            <= self.stop_loss_percentage
+        return self.backend.stop_hit(
+            self.position_evaluation(current_price=current_price),
+            self.equity,
+            self.stop_loss_percentage,
         )
 
     def __str__(self) -> str:
@@ -0,0 +1,150 @@
+from decimal import Decimal
+from numbers import Integral
+
+
+class DecimalBackend:
+    """
+    Reference arithmetic: prices, sizes and amounts are exact Decimals.
+    """
+
+    name = "decimal"
+
+    def amount(self, value):
+        """USD amount (equity, cash) to the backend representation."""
+        return Decimal(value)
+
+    def price(self, value):
+        return Decimal(value)
+
+    def ratio(self, value):
+        """Leverage or percentage to the backend representation."""
+        return Decimal(value)
+
+    def size(self, equity, leverage, entry_price):
+        """Number of units bought with `equity` at `leverage`."""
+        return equity * leverage / entry_price
+
+    def stop_hit(self, evaluation, equity, stop_loss_percentage):
+        return evaluation / equity <= stop_loss_percentage
+
+    def amount_value(self, amount):
+        """Backend amount to a number for people: Decimal or float."""
+        return amount
+
+    def amount_float(self, amount):
+        return float(amount)
+
+    def price_float(self, price):
+        return float(price)
+
+    def size_float(self, size):
+        return float(size)
+
+    def ratio_value(self, ratio):
+        """Backend ratio to a number for people: Decimal or float."""
+        return ratio
+
+    def ratio_float(self, ratio):
+        return float(ratio)
+
+
+class FloatBackend(DecimalBackend):
+    """
+    float64 arithmetic: much faster, rounding differs from the Decimal
+    reference in the last bits.
+    """
+
+    name = "float"
+
+    def amount(self, value):
+        return float(value)
+
+    def price(self, value):
+        return float(value)
+
+    def ratio(self, value):
+        return float(value)
+
+
+class FixedPointBackend(DecimalBackend):
+    """
+    Integer fixed-point arithmetic, following the exchange's perp precision:
+    sizes are lots of 10^-szDecimals units, prices ticks of
+    10^-(MAX_DECIMALS - szDecimals) and amounts micro-USD, so
+    price * size lands exactly on the amount scale. Leverage and the stop
+    ratio are millionths, scaled once when the position opens, so no
+    Decimal is left on the per-bar path.
+    Sizes are rounded down to whole lots like an order would be, so
+    positions are slightly smaller than with the Decimal reference.
+    """
+
+    name = "fixed"
+    MAX_DECIMALS = 6  # perp prices have at most 6 - szDecimals decimals
+    AMOUNT_SCALE = 10**MAX_DECIMALS
+    RATIO_SCALE = 10**6
+
+    def __init__(self, sz_decimals):
+        if not isinstance(sz_decimals, Integral) or not 0 <= sz_decimals <= self.MAX_DECIMALS:
+            raise ValueError(f"Invalid szDecimals: {sz_decimals}")
+        sz_decimals = int(sz_decimals)
+        self.sz_decimals = sz_decimals
+        self.size_scale = 10**sz_decimals
+        self.price_scale = 10 ** (self.MAX_DECIMALS - sz_decimals)
+
+    @staticmethod
+    def _scale(value, scale):
+        if isinstance(value, (int, float)):
+            return round(value * scale)
+        return int((Decimal(value) * scale).to_integral_value())
+
+    def amount(self, value):
+        return self._scale(value, self.AMOUNT_SCALE)
+
+    def price(self, value):
+        return self._scale(value, self.price_scale)
+
+    def ratio(self, value):
+        return self._scale(value, self.RATIO_SCALE)
+
+    def size(self, equity, leverage, entry_price):
+        # equity [1e-6 USD] * leverage [1e-6] / price [1e-(6-sz) USD] -> size [1e-sz units]
+        return equity * leverage // (entry_price * self.RATIO_SCALE)
+
+    def stop_hit(self, evaluation, equity, stop_loss_percentage):
+        return evaluation * self.RATIO_SCALE <= stop_loss_percentage * equity
+
+    def amount_value(self, amount):
+        return Decimal(amount) / self.AMOUNT_SCALE
+
+    def amount_float(self, amount):
+        return amount / self.AMOUNT_SCALE
+
+    def price_float(self, price):
+        return price / self.price_scale
+
+    def size_float(self, size):
+        return size / self.size_scale
+
+    def ratio_value(self, ratio):
+        return Decimal(ratio) / self.RATIO_SCALE
+
+    def ratio_float(self, ratio):
+        return ratio / self.RATIO_SCALE
+
+
+DECIMAL = DecimalBackend()
+FLOAT = FloatBackend()
+BACKENDS = ("decimal", "float", "fixed")
+
+
+def get_backend(name="decimal", sz_decimals=None):
+    """Backend instance by name; "fixed" needs the coin's szDecimals."""
+    if name == "decimal":
+        return DECIMAL
+    if name == "float":
+        return FLOAT
+    if name == "fixed":
+        if sz_decimals is None:
+            raise ValueError("szDecimals is required for the fixed backend")
+        return FixedPointBackend(sz_decimals)
+    raise ValueError(f"Invalid backend: {name}, expected one of {BACKENDS}")
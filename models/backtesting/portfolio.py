@@ -1,42 +1,57 @@
 from decimal import Decimal
+import numpy as np
 import pandas as pd
 from enum import Enum
 from .marginPosition import MarginPosition
 from .strategy import Action
+from .recorder import ColumnarRecorder
+from .snapshot import BarSnapshot, SymbolTable, HIGH, LOW
+from .numeric import get_backend
+from .positionBook import PositionBook
 import pprint
 
 
 def calculate_drawdowns(portfolio_history):
     portfolio_history = portfolio_history.copy()
-    portfolio_history["min_portfolio_value"] = portfolio_history[
-        ["close", "open", "high", "low"]
-    ].min(axis=1)
-    portfolio_history["max_portfolio_value"] = portfolio_history[
-        ["close", "open", "high", "low"]
-    ].max(axis=1)
-    portfolio_history["max_drawdown"] = (
-        portfolio_history["close"] - portfolio_history["max_portfolio_value"].cummax()
-    )
+    ohlc = portfolio_history[["close", "open", "high", "low"]].to_numpy(dtype=float)
+    close = ohlc[:, 0]
+    min_portfolio_value = ohlc.min(axis=1)
+    max_portfolio_value = ohlc.max(axis=1)
+    running_max = np.maximum.accumulate(max_portfolio_value)
+
+    portfolio_history["min_portfolio_value"] = min_portfolio_value
+    portfolio_history["max_portfolio_value"] = max_portfolio_value
+    portfolio_history["max_drawdown"] = close - running_max
     portfolio_history["max_drawdown_percentage"] = (
-        (portfolio_history["close"] - portfolio_history["max_portfolio_value"].cummax())
-        / portfolio_history["max_portfolio_value"].cummax()
-        * 100
+        (close - running_max) / running_max * 100
     )
     portfolio_history["max_return_percentage"] = (
-        (portfolio_history["close"] - portfolio_history["max_portfolio_value"].cummin())
-        / portfolio_history["min_portfolio_value"].cummin()
+        (close - np.minimum.accumulate(max_portfolio_value))
+        / np.minimum.accumulate(min_portfolio_value)
         * 100
     )
     # calculate 0 based return, meaning the return against the first closed value
-    portfolio_history["0-based_return"] = (
-        (portfolio_history["close"] - portfolio_history["close"].iloc[0])
-        / portfolio_history["close"].iloc[0]
-        * 100
-    )
+    portfolio_history["0-based_return"] = (close - close[0]) / close[0] * 100
 
     return portfolio_history
 
 
+def summarize(portfolio_history, trade_count):
+    """Headline metrics of a portfolio history with its drawdown columns."""
+    first, last = portfolio_history["close"].iloc[0], portfolio_history["close"].iloc[-1]
+    return {
+        "final_equity": last,
+        "return_percentage": (last - first) / first * 100,
+        "max_drawdown": portfolio_history["max_drawdown"].min(),
+        "max_drawdown_percentage": portfolio_history["max_drawdown_percentage"].min(),
+        "trade_count": trade_count,
+    }
+
+
+class NotEnoughCash(ValueError):
+    """An order skipped for lack of cash, not an error of the backtest."""
+
+
 class Transaction:
     class Side(Enum):
         OPEN_LONG = 1
@@ -53,51 +68,124 @@ class Transaction:
         self.leverage = leverage
 
 
+PORTFOLIO_HISTORY_DTYPES = {
+    "datetime": "datetime64[ns]",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "cash": "float64",
+}
+
+
 class Portfolio:
-    def __init__(self, initial_capital=0):
+    def __init__(self, initial_capital=0, backend="decimal", sz_decimals=None):
+        """
+        backend: "decimal" (reference), "float" or "fixed", see numeric.py
+        sz_decimals: szDecimals of the traded coins, {symbol: int} or one int
+            for all, required by the "fixed" backend
+        """
+        self.backend = backend
+        self.sz_decimals = sz_decimals
+        self._backends = {}
+        if backend == "fixed":
+            # fail here rather than on the first trade
+            for value in sz_decimals.values() if isinstance(sz_decimals, dict) else [sz_decimals]:
+                get_backend(backend, sz_decimals=value)
+        # amounts share one scale across coins, so any coin's backend does for cash
+        self.numeric = get_backend(
+            backend, sz_decimals=0 if backend == "fixed" else None
+        )
         self.is_end = False
-        self.cash = initial_capital
-        self.holdings = {}
+        self._cash = self.numeric.amount(initial_capital)
+        self.book = PositionBook()
+        self.symbols = SymbolTable()
+        self._traded = {}  # symbol -> symbol id, in order of first trade
 
         self.transactions = []
-        self.portfolio_history = pd.DataFrame(
-            columns=["datetime", "open", "high", "low", "close", "cash"]
+        self.recorder = ColumnarRecorder(
+            PORTFOLIO_HISTORY_DTYPES.keys(), dtypes=PORTFOLIO_HISTORY_DTYPES
         )
+        self._portfolio_history = None
+
+    @property
+    def cash(self):
+        return self.numeric.amount_value(self._cash)
+
+    @cash.setter
+    def cash(self, value):
+        self._cash = self.numeric.amount(value)
+
+    def backend_for(self, symbol):
+        """The numeric backend of the positions in `symbol`."""
+        backend = self._backends.get(symbol)
+        if backend is None:
+            sz_decimals = self.sz_decimals
+            if isinstance(sz_decimals, dict):
+                if symbol not in sz_decimals:
+                    raise ValueError(f"No szDecimals for {symbol}")
+                sz_decimals = sz_decimals[symbol]
+            backend = self._backends[symbol] = get_backend(
+                self.backend, sz_decimals=sz_decimals
+            )
+        return backend
+
+    @property
+    def holdings(self):
+        """{symbol: [open positions]}, as MarginPosition views over the book."""
+        return {
+            symbol: [self.book.view(slot) for slot in self.book.slots(symbol_id)]
+            for symbol, symbol_id in self._traded.items()
+        }
+
+    def _symbol_id(self, symbol):
+        symbol_id = self._traded.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._traded[symbol] = self.symbols.intern(symbol)
+        return symbol_id
+
+    @property
+    def portfolio_history(self):
+        """
+        The recorded valuations as a DataFrame, with the drawdown columns once
+        the portfolio has ended.
+        """
+        if self.is_end:
+            return self._portfolio_history
+        return self.recorder.to_df()
 
     def long(self, symbol, equity, price, date, leverage=1.0, stop_loss_percentage=0.0):
         """
         If No/Long Position, buy
         If Short Position, unwind
         """
+        backend = self.backend_for(symbol)
         try:
             _action = None
             _position = None
 
             # step 1: determine the current position
-            if not symbol in self.holdings:
-                self.holdings[symbol] = []
+            symbol_id = self._symbol_id(symbol)
+            slot = self.book.first(symbol_id, -1)
 
             # step 2b: if current position, if same side, open position, else, close position
-            for position in self.holdings[symbol][:]:
-                if position.side == MarginPosition.Side.SHORT:
-                    self.holdings[symbol].remove(position)
-                    self.cash += position.position_evaluation(price)
-                    self.transactions.append(
-                        Transaction(
-                            symbol=symbol,
-                            quantity=position.size,
-                            price=price,
-                            date=date,
-                            side=Transaction.Side.CLOSE_SHORT,
-                            leverage=position.leverage,
-                        )
+            if slot is not None:
+                position = self.book.close(slot)
+                self._cash += position.position_evaluation(price)
+                self.transactions.append(
+                    Transaction(
+                        symbol=symbol,
+                        quantity=position.size,
+                        price=price,
+                        date=date,
+                        side=Transaction.Side.CLOSE_SHORT,
+                        leverage=position.backend.ratio_value(position.leverage),
                     )
-                    ### RETURN VALUES ###
-                    _position = position
-                    _action = Transaction.Side.CLOSE_SHORT
-                    ### RETURN VALUES ###
-
-                    break
+                )
+                ### RETURN VALUES ###
+                _position = position
+                _action = Transaction.Side.CLOSE_SHORT
+                ### RETURN VALUES ###
             else:
                 # step 2a: if no current position, open poistion
                 position = MarginPosition(
@@ -107,17 +195,18 @@ class Portfolio:
                     side=MarginPosition.Side.LONG,
                     leverage=leverage,
                     stop_loss_percentage=stop_loss_percentage,
+                    backend=backend,
                 )
 
                 ### RETURN VALUES ###
                 _position = position  # set return value
-                if equity > self.cash:
-                    raise ValueError("Not enough cash to buy. skipping transaction.")
+                if position.equity > self._cash:
+                    raise NotEnoughCash("Not enough cash to buy. skipping transaction.")
                 _action = Transaction.Side.OPEN_LONG
                 ### RETURN VALUES ###
 
-                self.cash -= equity
-                self.holdings[symbol].append(position)
+                self._cash -= position.equity
+                _position = self.book.view(self.book.open(symbol_id, position))
                 self.transactions.append(
                     Transaction(
                         symbol=symbol,
@@ -125,12 +214,12 @@ class Portfolio:
                         price=price,
                         date=date,
                         side=Transaction.Side.OPEN_LONG,
-                        leverage=position.leverage,
+                        leverage=position.backend.ratio_value(position.leverage),
                     )
                 )
 
             return _action, _position
-        except ValueError as e:
+        except NotEnoughCash as e:
             print(e)
             return _action, _position
 
@@ -141,35 +230,33 @@ class Portfolio:
         If No/Short Position, short
         If Long Position, unwind
         """
+        backend = self.backend_for(symbol)
         try:
             _action = None
             _position = None
 
             # step 1: determine the current position
-            if not symbol in self.holdings:
-                self.holdings[symbol] = []
+            symbol_id = self._symbol_id(symbol)
+            slot = self.book.first(symbol_id, 1)
 
             # step 2b: if current position, if same side, open position, else, close position
-            for position in self.holdings[symbol][:]:
-                if position.side == MarginPosition.Side.LONG:
-                    self.holdings[symbol].remove(position)
-                    self.cash += position.position_evaluation(price)
-                    self.transactions.append(
-                        Transaction(
-                            symbol=symbol,
-                            quantity=position.size,
-                            price=price,
-                            date=date,
-                            side=Transaction.Side.CLOSE_LONG,
-                            leverage=position.leverage,
-                        )
+            if slot is not None:
+                position = self.book.close(slot)
+                self._cash += position.position_evaluation(price)
+                self.transactions.append(
+                    Transaction(
+                        symbol=symbol,
+                        quantity=position.size,
+                        price=price,
+                        date=date,
+                        side=Transaction.Side.CLOSE_LONG,
+                        leverage=position.backend.ratio_value(position.leverage),
                     )
-
-                    ### RETURN VALUES ###
-                    _position = position
-                    _action = Transaction.Side.CLOSE_LONG
-                    ### RETURN VALUES ###
-                    break
+                )
+                ### RETURN VALUES ###
+                _position = position
+                _action = Transaction.Side.CLOSE_LONG
+                ### RETURN VALUES ###
             else:
                 # step 2a: if no current position, open poistion
                 position = MarginPosition(
@@ -179,17 +266,18 @@ class Portfolio:
                     side=MarginPosition.Side.SHORT,
                     leverage=leverage,
                     stop_loss_percentage=stop_loss_percentage,
+                    backend=backend,
                 )
 
                 ### RETURN VALUES ###
                 _position = position  # set return value
-                if equity > self.cash:
-                    raise ValueError("Not enough cash to buy. skipping transaction.")
+                if position.equity > self._cash:
+                    raise NotEnoughCash("Not enough cash to buy. skipping transaction.")
                 _action = Transaction.Side.OPEN_SHORT
                 ### RETURN VALUES ###
 
-                self.cash -= equity  # equity is needed even to short
-                self.holdings[symbol].append(position)
+                self._cash -= position.equity  # equity is needed even to short
+                _position = self.book.view(self.book.open(symbol_id, position))
                 self.transactions.append(
                     Transaction(
                         symbol=symbol,
@@ -197,85 +285,101 @@ class Portfolio:
                         price=price,
                         date=date,
                         side=Transaction.Side.OPEN_SHORT,
-                        leverage=position.leverage,
+                        leverage=position.backend.ratio_value(position.leverage),
                     )
                 )
 
             return _action, _position
-        except ValueError as e:
+        except NotEnoughCash as e:
             print(e)
             return _action, _position
 
     def evaluate_portfolio(self, current_row: pd.DataFrame, verbose=True):
         """
         Evaluate the portfolio at the current time, evalute by open, high, low, close
+        Returns the recorded valuation.
         """
-        o, h, l, c = 0, 0, 0, 0
-        # start with self.cash
-        for symbol, position_list in self.holdings.items():
-            for position in position_list:
-                o += position.position_evaluation(
-                    current_price=current_row.loc[
-                        current_row["symbol"] == symbol, "open"
-                    ].values[0]
-                )
-                h += position.position_evaluation(
-                    current_price=current_row.loc[
-                        current_row["symbol"] == symbol, "high"
-                    ].values[0]
-                )
-                l += position.position_evaluation(
-                    current_price=current_row.loc[
-                        current_row["symbol"] == symbol, "low"
-                    ].values[0]
-                )
-                c += position.position_evaluation(
-                    current_price=current_row.loc[
-                        current_row["symbol"] == symbol, "close"
-                    ].values[0]
-                )
-                # if verbose:
-                #     print(position)
-                #     current_price = current_row.loc[
-                #         current_row["symbol"] == symbol, "close"
-                #     ].values[0]
-                #     print(
-                #         "Current: ",
-                #         current_price,
-                #         "Earning: ",
-                #         position.position_evaluation(current_price),
-                #     )
-
-        self.portfolio_history = pd.concat(
-            [
-                self.portfolio_history,
-                pd.DataFrame(
-                    [
-                        {
-                            "datetime": current_row["datetime"].values[0],
-                            "open": o + self.cash,
-                            "high": h + self.cash,
-                            "low": l + self.cash,
-                            "close": c + self.cash,
-                            "cash": self.cash,
-                        }
-                    ]
-                ),
-            ],
-            ignore_index=True,
+        return self.record(BarSnapshot.from_frame(current_row, self.symbols))
+
+    def record(self, snapshot: BarSnapshot):
+        """Evaluate the portfolio for a bar and append it to the history."""
+        row = self.evaluate(snapshot)
+        self.recorder.append(row)
+        return row
+
+    def evaluate(self, snapshot: BarSnapshot):
+        """
+        Value the portfolio by open, high, low, close of a single bar, marking
+        every open position to market at once.
+        """
+        symbol_ids, sign, entry_price, size, equity = self.position_arrays()
+        cash = self.numeric.amount_float(self._cash)
+        values = np.zeros(4)
+        if len(symbol_ids):
+            prices = snapshot.prices(symbol_ids)
+            values = (
+                equity[:, None] + sign[:, None] * (prices - entry_price[:, None]) * size[:, None]
+            ).sum(axis=0)
+        o, h, l, c = values + cash
+
+        return {
+            "datetime": snapshot.datetime,
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "cash": cash,
+        }
+
+    def position_arrays(self):
+        """
+        The open positions as (symbol_id, sign, entry_price, size, equity) arrays,
+        gathered from the book's columns.
+        """
+        book = self.book
+        slots = book.open_slots()
+        return (
+            book.symbol_id[slots],
+            book.side[slots].astype(np.float64),
+            book.entry_price[slots],
+            book.size[slots],
+            book.equity[slots],
         )
-        return self.portfolio_history
 
     def check_portfolio_state(self, current_row: pd.DataFrame):
         """
         Clean up the portfolio at each iteration
         """
-        history = None
-        def _try_stop_loss(position, price, datetime):
-            v = position.position_evaluation(price)
-            if position.should_stop_loss(price):
-                self.holdings[symbol].remove(position)
-                self.cash += v
+        history = self.stop_loss(BarSnapshot.from_frame(current_row, self.symbols))
+        if not history:
+            return None
+        return pd.DataFrame(history)
+
+    def stop_loss(self, snapshot: BarSnapshot):
+        """
+        Force liquidate the positions hitting their stop loss within a bar,
+        longs on the low and shorts on the high. Only the positions whose
+        stop price the bar crossed are evaluated.
+        Returns the history records of the liquidations.
+        """
+        history = []
+        datetime = snapshot.datetime
+        for symbol, symbol_id in self._traded.items():
+            if not self.book.count(symbol_id):
+                continue
+            _high, _low = snapshot.prices([symbol_id])[0, [HIGH, LOW]]
+            for slot in self.book.stop_candidates(symbol_id, _low, _high):
+                if self.book.side[slot] > 0:
+                    price = _low  # work on low
+                else:
+                    price = _high  # work on high
+
+                v, should_stop_loss = self.book.evaluation(slot, price)
+                if not should_stop_loss:
+                    continue
+
+                position = self.book.close(slot)
+                self._cash += v
                 self.transactions.append(
                     Transaction(
                         symbol=symbol,
@@ -289,59 +393,20 @@ class Portfolio:
                         ),
                     )
                 )
-                _h = pd.DataFrame(
+                history.append(
                     {
                         "datetime": datetime,
                         "symbol": symbol,
                         "action": Action.FORCE_LIQUITATION,
                         "price": price,
-                        "quantity": position.size,
-                    },
-                    index=[0],
+                        "quantity": position.quantity,
+                    }
                 )
                 print(
                     "clean up position: ",
                     position.side,
                     position.size,
                 )
-                return _h
-
-        for symbol, position_list in self.holdings.items():
-            for position in position_list[:]:
-                current_datetime = current_row["datetime"].values[0]
-
-                if position.side == MarginPosition.Side.LONG:
-                    current_low_price = current_row.loc[
-                        current_row["symbol"] == symbol, "low"
-                    ].values[0]
-                    _h = _try_stop_loss(
-                        position=position,
-                        price=current_low_price, # work on low
-                        datetime=current_datetime,
-                    )
-                else:
-                    current_high_price = current_row.loc[
-                        current_row["symbol"] == symbol, "high"
-                    ].values[0]
-                    _h = _try_stop_loss(
-                        position=position,
-                        price=current_high_price, # work on high
-                        datetime=current_datetime,
-                    )
-
-                if _h is None:
-                    continue
-                else:
-                    if history is None:
-                        history = _h
-                    else:
-                        history = pd.concat(
-                            [
-                                history,
-                                _h,
-                            ],
-                            ignore_index=True,
-                        )
 
         return history
 
@@ -386,6 +451,13 @@ class Portfolio:
             self.portfolio_history["max_return_percentage"].max(),
         )
 
+    def summary(self):
+        """
+        Headline metrics of an ended portfolio:
+        final equity, return, max drawdown and number of transactions.
+        """
+        return summarize(self.portfolio_history, len(self.transactions))
+
     def end(self):
+        self._portfolio_history = calculate_drawdowns(self.recorder.to_df())
         self.is_end = True
-        self.portfolio_history = calculate_drawdowns(self.portfolio_history)
@@ -0,0 +1,254 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+
+import numpy as np
+
+from .marginPosition import MarginPosition
+
+
+class PositionBook:
+    """
+    Open positions as a struct of arrays, one slot per position.
+
+    The float64 columns (entry_price, equity, leverage, size, stop_price)
+    are for vectorized marking and risk checks; `exact` keeps the position
+    in its numeric backend's units (backend, entry_price, equity, leverage,
+    size, stop_loss_percentage) for the cash flows.
+    Closed slots go on a free list and are reused, so opening and closing
+    are O(1); each symbol's slots are kept in opening order.
+
+    Stop prices are fixed when a position opens, so they are also kept
+    sorted per symbol and side: a bar's low/high then finds the crossed
+    stops by bisection instead of evaluating every position.
+    """
+
+    FLOAT_COLUMNS = ("entry_price", "equity", "leverage", "size", "stop_price")
+    # stops are compared in float64; positions this close to the price are
+    # returned as candidates too and decided by the exact backend check
+    STOP_TOLERANCE = 1e-9
+
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.length = 0  # high-water mark of used slots
+        self.symbol_id = np.empty(0, dtype=np.int64)
+        self.side = np.empty(0, dtype=np.int8)  # +1 long, -1 short
+        self.generation = np.empty(0, dtype=np.int64)
+        self.opened = np.empty(0, dtype=np.int64)  # opening sequence number
+        self.active = np.empty(0, dtype=bool)
+        for col in self.FLOAT_COLUMNS:
+            setattr(self, col, np.empty(0))
+        self.exact = np.empty(0, dtype=object)
+        self.symbols = np.empty(0, dtype=object)
+
+        self._free = []
+        self._by_symbol = {}  # symbol_id -> OrderedDict(slot -> None)
+        self._stops = {}  # (symbol_id, side) -> sorted [(stop_price, slot)]
+        self._opened = 0
+        self._open_slots = None
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for col in ("symbol_id", "side", "generation", "opened", "active", *self.FLOAT_COLUMNS, "exact", "symbols"):
+            array = getattr(self, col)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[: self.capacity] = array
+            setattr(self, col, grown)
+        self.capacity = capacity
+
+    def __len__(self):
+        return len(self.open_slots())
+
+    ########## open / close ##########
+    def open(self, symbol_id, position: MarginPosition):
+        """Store `position` in a free slot and return the slot."""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self.length == self.capacity:
+                self._grow(max(self.capacity * 2, 1))
+            slot = self.length
+            self.length += 1
+
+        backend = position.backend
+        sign = 1 if position.side == MarginPosition.Side.LONG else -1
+        entry_price = backend.price_float(position.entry_price)
+        equity = backend.amount_float(position.equity)
+        size = position.quantity
+
+        self.symbol_id[slot] = symbol_id
+        self.side[slot] = sign
+        self.active[slot] = True
+        self.entry_price[slot] = entry_price
+        self.equity[slot] = equity
+        self.leverage[slot] = backend.ratio_float(position.leverage)
+        self.size[slot] = size
+        self.stop_price[slot] = stop = stop_price(
+            sign, entry_price, equity, size, backend.ratio_float(position.stop_loss_percentage)
+        )
+        self.opened[slot] = self._opened
+        self._opened += 1
+        self.symbols[slot] = position.symbol
+        self.exact[slot] = (
+            backend,
+            position.entry_price,
+            position.equity,
+            position.leverage,
+            position.size,
+            position.stop_loss_percentage,
+        )
+        self._by_symbol.setdefault(symbol_id, OrderedDict())[slot] = None
+        insort(self._stops.setdefault((symbol_id, sign), []), (stop, slot))
+        self._open_slots = None
+        return slot
+
+    def close(self, slot):
+        """Free `slot` and return its position, detached from the book."""
+        position = self.detach(slot)
+        symbol_id = self.symbol_id[slot]
+        stops = self._stops[(symbol_id, self.side[slot])]
+        del stops[bisect_left(stops, (self.stop_price[slot], slot))]
+        self.active[slot] = False
+        self.generation[slot] += 1
+        self.exact[slot] = None
+        del self._by_symbol[symbol_id][slot]
+        self._free.append(slot)
+        self._open_slots = None
+        return position
+
+    ########## lookups ##########
+    def slots(self, symbol_id):
+        """Open slots of a symbol, in opening order."""
+        return list(self._by_symbol.get(symbol_id, ()))
+
+    def count(self, symbol_id):
+        """Number of open positions of a symbol."""
+        return len(self._by_symbol.get(symbol_id, ()))
+
+    def first(self, symbol_id, side):
+        """First opened slot of a symbol on `side` (+1/-1), or None."""
+        for slot in self._by_symbol.get(symbol_id, ()):
+            if self.side[slot] == side:
+                return slot
+        return None
+
+    def stop_candidates(self, symbol_id, low, high):
+        """
+        Slots of a symbol whose stop a bar may have crossed, longs on the low
+        and shorts on the high, in opening order. Confirm with evaluation().
+        """
+        tolerance = self.STOP_TOLERANCE
+        longs = self._stops.get((symbol_id, 1), ())
+        shorts = self._stops.get((symbol_id, -1), ())
+        # long stops at or above the low, short stops at or below the high
+        start = bisect_left(longs, (low - abs(low) * tolerance,))
+        end = bisect_right(shorts, (high + abs(high) * tolerance, np.inf))
+        slots = [slot for _, slot in longs[start:]]
+        slots += [slot for _, slot in shorts[:end]]
+        if len(slots) > 1:
+            slots.sort(key=self.opened.__getitem__)
+        return slots
+
+    def open_slots(self):
+        """Open slots as an array, cached until the next open or close."""
+        if self._open_slots is None:
+            self._open_slots = np.flatnonzero(self.active[: self.length])
+        return self._open_slots
+
+    def evaluation(self, slot, price):
+        """
+        Exact (evaluation, should_stop_loss) of `slot` at `price`, the same as
+        MarginPosition.position_evaluation / should_stop_loss.
+        """
+        backend, entry_price, equity, _, size, stop_loss_percentage = self.exact[slot]
+        price = backend.price(price)
+        if self.side[slot] > 0:
+            v = equity + (price - entry_price) * size
+        else:
+            v = equity + (entry_price - price) * size
+        return v, backend.stop_hit(v, equity, stop_loss_percentage)
+
+    def view(self, slot):
+        return PositionView(self, slot)
+
+    def detach(self, slot):
+        """A standalone MarginPosition with the values of `slot`."""
+        backend, entry_price, equity, leverage, size, stop_loss_percentage = self.exact[slot]
+        position = MarginPosition.__new__(MarginPosition)
+        position.backend = backend
+        position.symbol = self.symbols[slot]
+        position.side = _SIDES[self.side[slot]]
+        position.entry_price = entry_price
+        position.equity = equity
+        position.leverage = leverage
+        position.size = size
+        position.stop_loss_percentage = stop_loss_percentage
+        return position
+
+
+def stop_price(sign, entry_price, equity, size, stop_loss_percentage):
+    """
+    Price at which a position is worth stop_loss_percentage of its equity:
+    equity + sign * (price - entry_price) * size == stop_loss_percentage * equity
+    """
+    if size == 0:
+        return -np.inf if sign > 0 else np.inf
+    return entry_price - sign * (1 - stop_loss_percentage) * equity / size
+
+
+_SIDES = {1: MarginPosition.Side.LONG, -1: MarginPosition.Side.SHORT}
+
+
+class PositionView(MarginPosition):
+    """
+    MarginPosition reading its fields from an open slot of a PositionBook.
+    The view goes stale, and raises, once its position is closed.
+    """
+
+    def __init__(self, book: PositionBook, slot):
+        self.book = book
+        self.slot = slot
+        self.generation = book.generation[slot]
+
+    def _exact(self):
+        if self.book.generation[self.slot] != self.generation:
+            raise ValueError("Position is closed")
+        return self.book.exact[self.slot]
+
+    @property
+    def backend(self):
+        return self._exact()[0]
+
+    @property
+    def symbol(self):
+        self._exact()
+        return self.book.symbols[self.slot]
+
+    @property
+    def side(self):
+        self._exact()
+        return _SIDES[self.book.side[self.slot]]
+
+    @property
+    def entry_price(self):
+        return self._exact()[1]
+
+    @property
+    def equity(self):
+        return self._exact()[2]
+
+    @property
+    def leverage(self):
+        return self._exact()[3]
+
+    @property
+    def size(self):
+        return self._exact()[4]
+
+    @property
+    def stop_loss_percentage(self):
+        return self._exact()[5]
+
+    @property
+    def stop_price(self):
+        self._exact()
+        return self.book.stop_price[self.slot]
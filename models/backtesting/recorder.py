@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+class ColumnarRecorder:
+    """
+    Append-only table kept as one numpy array per column.
+
+    Arrays are preallocated and doubled when full, so appending a row is
+    amortized O(1); the DataFrame is only built when asked for, and cached
+    until the next append.
+    Columns without a dtype in `dtypes` are stored as objects.
+    """
+
+    def __init__(self, columns, dtypes=None, capacity=1024):
+        dtypes = dtypes or {}
+        self.columns = list(columns)
+        self.dtypes = {col: np.dtype(dtypes.get(col, object)) for col in self.columns}
+        self.length = 0
+        self._arrays = {
+            col: self._empty(self.dtypes[col], capacity) for col in self.columns
+        }
+        self._df = None
+
+    @staticmethod
+    def _empty(dtype, capacity):
+        if dtype == object:
+            return np.empty(capacity, dtype=object)
+        if dtype.kind == "M":
+            return np.full(capacity, np.datetime64("NaT"), dtype=dtype)
+        return np.full(capacity, np.nan, dtype=dtype)
+
+    def _reserve(self, length):
+        capacity = len(self._arrays[self.columns[0]]) if self.columns else 0
+        if length <= capacity:
+            return
+        while capacity < length:
+            capacity = max(capacity * 2, 1)
+        for col, array in self._arrays.items():
+            grown = self._empty(self.dtypes[col], capacity)
+            grown[: self.length] = array[: self.length]
+            self._arrays[col] = grown
+
+    def __len__(self):
+        return self.length
+
+    def append(self, row: dict):
+        """Append one row; missing columns are left empty."""
+        self._reserve(self.length + 1)
+        for col, value in row.items():
+            self._arrays[col][self.length] = value
+        self.length += 1
+        self._df = None
+
+    def extend(self, rows):
+        """Append rows given as a list of dicts, or as a dict of column arrays."""
+        if isinstance(rows, dict):
+            n = len(next(iter(rows.values()))) if rows else 0
+            self._reserve(self.length + n)
+            for col, values in rows.items():
+                self._arrays[col][self.length : self.length + n] = values
+            self.length += n
+            self._df = None
+        else:
+            for row in rows:
+                self.append(row)
+
+    def column(self, col):
+        """View of the recorded values of a column."""
+        return self._arrays[col][: self.length]
+
+    def row(self, i):
+        """Row `i` as a dict, negative indexes count from the end."""
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(f"row {i} out of range")
+        return {col: self._arrays[col][i] for col in self.columns}
+
+    def last(self, col):
+        return self._arrays[col][self.length - 1]
+
+    def to_df(self):
+        if self._df is None:
+            self._df = pd.DataFrame(
+                {col: self.column(col) for col in self.columns}, columns=self.columns
+            )
+        return self._df
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+OHLC = ["open", "high", "low", "close"]
+OPEN, HIGH, LOW, CLOSE = range(4)
+
+
+class SymbolTable:
+    """Interns symbols to dense integer ids, in order of first appearance."""
+
+    def __init__(self, symbols=()):
+        self.ids = {}
+        self.symbols = []
+        for symbol in symbols:
+            self.intern(symbol)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.ids
+
+    def intern(self, symbol):
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def intern_many(self, symbols):
+        return np.fromiter((self.intern(s) for s in symbols), dtype=np.int64)
+
+
+class BarSnapshot:
+    """
+    Prices of every symbol for one bar, as an (n_symbols, 4) open/high/low/close
+    array indexed by SymbolTable id; NaN for symbols without a bar.
+    """
+
+    def __init__(self, datetime, ohlc):
+        self.datetime = datetime
+        self.ohlc = ohlc
+
+    @classmethod
+    def from_prices(cls, datetime, prices: dict, symbols: SymbolTable):
+        """Build from {symbol: (open, high, low, close)}."""
+        ids = [symbols.intern(symbol) for symbol in prices]
+        ohlc = np.full((len(symbols), 4), np.nan)
+        ohlc[ids] = list(prices.values())
+        return cls(datetime, ohlc)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, symbols: SymbolTable):
+        """Build from the rows of a single bar, one row per symbol."""
+        ids = symbols.intern_many(frame["symbol"].to_numpy())
+        ohlc = np.full((len(symbols), 4), np.nan)
+        ohlc[ids] = frame[OHLC].to_numpy(dtype=np.float64)
+        return cls(frame["datetime"].to_numpy()[0], ohlc)
+
+    @classmethod
+    def iter_frame(cls, frame: pd.DataFrame, symbols: SymbolTable):
+        """
+        Yield one snapshot per datetime of a long multi-symbol frame, interning
+        the symbols and pulling the columns out only once.
+        """
+        frame = frame.sort_values("datetime", kind="stable")
+        ids = symbols.intern_many(frame["symbol"].to_numpy())
+        prices = frame[OHLC].to_numpy(dtype=np.float64)
+        datetimes = frame["datetime"].to_numpy()
+        bounds = np.flatnonzero(datetimes[1:] != datetimes[:-1]) + 1
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(frame)]):
+            ohlc = np.full((len(symbols), 4), np.nan)
+            ohlc[ids[start:end]] = prices[start:end]
+            yield cls(datetimes[start], ohlc)
+
+    def prices(self, symbol_ids):
+        """(len(symbol_ids), 4) prices of the given symbols."""
+        symbol_ids = np.asarray(symbol_ids)
+        if len(symbol_ids) and symbol_ids.max() >= len(self.ohlc):
+            raise KeyError("No price in the snapshot for some symbols")
+        prices = self.ohlc[symbol_ids]
+        if np.isnan(prices).any():
+            raise KeyError("No price in the snapshot for some symbols")
+        return prices
@@ -3,10 +3,6 @@ import numpy as np
 from enum import Enum
 
 
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-
 
 class Action(Enum):
     """Enum for the action to take."""
@@ -25,6 +21,10 @@ class Action(Enum):
 
 
 def _plotly_portfolio(portfolio_history):
+    # plotly is only needed for charts, keep it out of headless imports
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     portfolio_history = portfolio_history.copy()
     if not isinstance(portfolio_history.index, pd.DatetimeIndex):
         portfolio_history.set_index("datetime", inplace=True)
@@ -149,6 +149,9 @@ def _plotly_strategy(data, history, portfolio_history):
     Use Plotly to create an interactive plot of OHLCV data with Bollinger Bands
     and overlays of buy/sell markers based on the history DataFrame.
     """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     # fix data
     data = data.copy()
     history = history.copy()
@@ -387,6 +390,24 @@ class Strategy:
         """
         raise NotImplementedError("run() method must be implemented by the subclass.")
 
+    def run_bar(self, cursor):
+        """
+        Entry point of the array engine, called once per bar with a BarCursor.
+
+        Strategies that only implement run() are adapted here, so they see
+        the same current row and history slice as with the iterrows engine.
+        Override this to read the cursor arrays directly instead.
+        """
+        self.run(cursor.current_row(), cursor.historical_data())
+
+    def run_batch(self, data):
+        """
+        Entry point of the vectorized engine, called once with the whole data.
+        """
+        raise NotImplementedError(
+            "run_batch() method must be implemented by the subclass."
+        )
+
     def plot_history(self):
         """
         this method will plot the action history of the strategy
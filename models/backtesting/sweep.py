@@ -0,0 +1,86 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+import pandas as pd
+
+from .backtesting import BackTesting
+from .BollingerBandsReEntryStrategy import BollingerBandsReEntryStrategy
+
+
+def parameter_grid(param_grid: dict):
+    """
+    Expand {"k": [1.5, 2], "leverage": [5, 10]} into every combination,
+    as a list of keyword dicts.
+    """
+    keys = list(param_grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*param_grid.values())]
+
+
+def run_strategy(data, params, strategy_class=BollingerBandsReEntryStrategy, mode="vectorized"):
+    """Run one backtest quietly and return the params with the portfolio summary."""
+    strategy = strategy_class(**params)
+    strategy.VERBOSE = False
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        BackTesting(verbose=False).run_backtesting(data, strategy=strategy, mode=mode)
+    return {**params, **strategy.portfolio.summary()}
+
+
+# set once per worker process, so the dataset is not pickled for every task
+_worker_args = None
+
+
+def _init_worker(data, fn, kwargs):
+    global _worker_args
+    _worker_args = (data, fn, kwargs)
+
+
+def _run_worker(item):
+    data, fn, kwargs = _worker_args
+    return fn(data, item, **kwargs)
+
+
+def map_with_shared(data, fn, items, processes, chunksize=1, **kwargs):
+    """
+    [fn(data, item, **kwargs) for item in items] across a process pool.
+    Each worker receives data once, at start-up, rather than with every
+    item; fn must be a module-level function. processes=1 runs in the
+    current process.
+    """
+    if processes == 1:
+        return [fn(data, item, **kwargs) for item in items]
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(data, fn, kwargs)
+    ) as executor:
+        return list(executor.map(_run_worker, items, chunksize=chunksize))
+
+
+def run_parameter_sweep(
+    data,
+    param_grid: dict,
+    strategy_class=BollingerBandsReEntryStrategy,
+    mode="vectorized",
+    processes=None,
+):
+    """
+    Backtest every combination of param_grid on data across a process pool.
+
+    Each worker receives the dataset once, then runs its share of the
+    combinations independently, so throughput scales with the cores.
+    processes=1 runs in the current process.
+    Returns one row per combination: the parameters, final equity, return,
+    max drawdown and trade count.
+    """
+    combinations = parameter_grid(param_grid)
+    processes = processes or os.cpu_count()
+    results = map_with_shared(
+        data,
+        run_strategy,
+        combinations,
+        processes,
+        chunksize=max(1, len(combinations) // (processes * 4)),
+        strategy_class=strategy_class,
+        mode=mode,
+    )
+    return pd.DataFrame(results)
@@ -0,0 +1,169 @@
+import os
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from .backtesting import BackTesting
+from .BollingerBandsReEntryStrategy import BollingerBandsReEntryStrategy
+from .portfolio import calculate_drawdowns, summarize
+from .sweep import map_with_shared, parameter_grid, run_parameter_sweep
+
+
+def walk_forward_folds(n_bars, train_size, test_size, step=None, warmup=0, anchored=False):
+    """
+    Split n_bars into train/test folds, as bar positions (end exclusive).
+
+    Rolling folds move a train_size window by step bars (test_size by
+    default); anchored folds keep the train window starting at bar 0.
+    Test windows follow their train window and must not overlap, so the
+    folds can be stitched. Each test window is run from warmup_start,
+    `warmup` bars earlier, so the indicators are ready when it begins.
+    """
+    step = step or test_size
+    if min(train_size, test_size) < 1:
+        raise ValueError("train_size and test_size must be positive")
+    if step < test_size:
+        raise ValueError("step must be at least test_size, test windows would overlap")
+    if warmup < 0:
+        raise ValueError("warmup must not be negative")
+
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n_bars:
+        test_start = start + train_size
+        folds.append(
+            {
+                "fold": len(folds),
+                "train_start": 0 if anchored else start,
+                "train_end": test_start,
+                "warmup_start": max(0, test_start - warmup),
+                "test_start": test_start,
+                "test_end": test_start + test_size,
+            }
+        )
+        start += step
+    return folds
+
+
+def run_fold(data, fold, params=None, param_grid=None, strategy_class=BollingerBandsReEntryStrategy,
+             select_by="return_percentage", mode="vectorized"):
+    """
+    Run one fold: pick the best params of param_grid on the train window (by
+    the largest select_by), then backtest them on the warm-up and test window.
+    Returns the fold record, the test window's portfolio history and the
+    equity the test window starts from.
+    """
+    datetimes = np.unique(data["datetime"].to_numpy())
+    train = _between(data, datetimes, fold["train_start"], fold["train_end"])
+    test = _between(data, datetimes, fold["warmup_start"], fold["test_end"])
+    test_start = datetimes[fold["test_start"]]
+
+    record = {
+        "fold": fold["fold"],
+        "train_start": datetimes[fold["train_start"]],
+        "train_end": datetimes[fold["train_end"] - 1],
+        "test_start": test_start,
+        "test_end": datetimes[fold["test_end"] - 1],
+    }
+    params = dict(params or {})
+    if param_grid:
+        sweep = run_parameter_sweep(
+            train, param_grid, strategy_class=strategy_class, mode=mode, processes=1
+        )
+        best = sweep[select_by].idxmax()
+        # the sweep rows follow the grid combinations; taking the winner
+        # from them keeps plain Python values, not numpy scalars
+        params.update(parameter_grid(param_grid)[best])
+        record[f"train_{select_by}"] = sweep.at[best, select_by]
+    record.update(params)
+
+    strategy = strategy_class(**params)
+    strategy.VERBOSE = False
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        BackTesting(verbose=False).run_backtesting(test, strategy=strategy, mode=mode)
+    portfolio = strategy.portfolio
+
+    history = portfolio.portfolio_history
+    in_test = history["datetime"].to_numpy() >= test_start
+    # the equity the test window starts from: the last warm-up valuation
+    base = history["close"].to_numpy()[~in_test][-1:]
+    history = calculate_drawdowns(history.loc[in_test].reset_index(drop=True))
+    history.insert(1, "fold", fold["fold"])
+    base = base[0] if len(base) else history["close"].iloc[0]
+
+    trade_count = sum(1 for t in portfolio.transactions if t.date >= test_start)
+    record.update(summarize(history, trade_count))
+    return record, history, base
+
+
+def _between(data, datetimes, start, end):
+    """The rows of data from the start-th to before the end-th datetime."""
+    values = data["datetime"].to_numpy()
+    upper = datetimes[end] if end < len(datetimes) else None
+    mask = values >= datetimes[start]
+    if upper is not None:
+        mask &= values < upper
+    return data.loc[mask].reset_index(drop=True)
+
+
+def stitch_folds(histories, bases):
+    """
+    Chain the test windows into one equity curve: each fold is rescaled so
+    it starts where the previous one ended, compounding the fold returns.
+    bases are the equities the folds start from.
+    """
+    level = None
+    curves = []
+    for history, base in zip(histories, bases):
+        level = base if level is None else level
+        curve = history[["datetime", "fold", "open", "high", "low", "close"]].copy()
+        curve[["open", "high", "low", "close"]] *= level / base
+        level = curve["close"].iloc[-1]
+        curves.append(curve)
+    return calculate_drawdowns(pd.concat(curves, ignore_index=True))
+
+
+def run_walk_forward(
+    data,
+    train_size,
+    test_size,
+    params=None,
+    param_grid=None,
+    strategy_class=BollingerBandsReEntryStrategy,
+    step=None,
+    warmup=20,
+    anchored=False,
+    select_by="return_percentage",
+    mode="vectorized",
+    processes=None,
+):
+    """
+    Walk-forward backtest over rolling (or anchored) train/test folds.
+
+    Sizes are in bars (distinct datetimes of data). With param_grid, each
+    fold sweeps it on its train window and tests the best combination,
+    otherwise every fold tests params. Folds run concurrently across a
+    process pool; processes=1 runs them in the current process.
+    Returns the stitched equity curve of the test windows, with drawdowns,
+    and one row of metrics per fold.
+    """
+    data = data.sort_values("datetime", kind="stable").reset_index(drop=True)
+    n_bars = len(np.unique(data["datetime"].to_numpy()))
+    folds = walk_forward_folds(
+        n_bars, train_size, test_size, step=step, warmup=warmup, anchored=anchored
+    )
+    if not folds:
+        raise ValueError(f"Not enough bars for a fold: {n_bars}")
+    kwargs = {
+        "params": params,
+        "param_grid": param_grid,
+        "strategy_class": strategy_class,
+        "select_by": select_by,
+        "mode": mode,
+    }
+    processes = min(processes or os.cpu_count(), len(folds))
+    results = map_with_shared(data, run_fold, folds, processes, **kwargs)
+
+    records, histories, bases = zip(*results)
+    return stitch_folds(histories, bases), pd.DataFrame(list(records))
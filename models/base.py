@@ -1,9 +1,28 @@
 import json
+from operator import attrgetter
 from typing import List
-from IPython.display import JSON
+import msgpack
 
 class PythonDictObject:
+    """
+    Base of the models. Subclasses declaring their field schema get
+    serializers compiled once per class:
+
+        FIELDS = ("name", "marketData", ...)   # attributes, in output order
+        NESTED = {"marketData": MarketData}    # fields holding models
+
+    and can use __slots__ = FIELDS. Fields that are properties are output
+    by to_dict but left out of the binary encoding, being derived.
+    Without a schema, to_dict walks __dict__.
+    """
+
+    __slots__ = ()
+    FIELDS = None
+    NESTED = {}
+
     def to_dict(self, flatten=False):
+        if self.FIELDS is not None:
+            return _compiled(type(self))[1 if flatten else 0](self)
         # Simple conversion using a comprehension, directly utilizing self.__dict__
         result = {k: self._value_to_dict(v, flatten) for k, v in self.__dict__.items()}
         return self._flatten_dict(result) if flatten else result
@@ -30,6 +49,23 @@ class PythonDictObject:
                 items.append((new_key, v))
         return dict(items)
 
+    ########## msgpack ##########
+    def to_msgpack(self) -> bytes:
+        """
+        Binary encoding: with a schema, the stored field values in FIELDS
+        order (nested models as nested arrays), otherwise the to_dict map.
+        """
+        if self.FIELDS is not None:
+            return msgpack.packb(_compiled(type(self))[2](self))
+        return msgpack.packb(self.to_dict())
+
+    @classmethod
+    def from_msgpack(cls, data: bytes):
+        values = msgpack.unpackb(data)
+        if cls.FIELDS is not None:
+            return _compiled(cls)[3](values)
+        return cls.from_dict(values)
+
     def to_json_pretty(self) -> str:
         # Convert the Market object to a dictionary
         dict_representation = self.to_dict()
@@ -37,7 +73,82 @@ class PythonDictObject:
         return json.dumps(dict_representation, indent=4)
 
     def to_display_json(self):
+        # IPython is only needed in notebooks, import it on first use
+        from IPython.display import JSON
+
         # Convert the Market object to a dictionary
         dict_representation = self.to_dict()
         # Use the display() function with a JSON object for pretty, interactive rendering
         return JSON(dict_representation)
+
+
+# class -> (to_dict, to_flat_dict, to_values, from_values)
+_SERIALIZERS = {}
+
+
+def _compiled(cls):
+    """The serializers of a class with a FIELDS schema, built on first use."""
+    serializers = _SERIALIZERS.get(cls)
+    if serializers is None:
+        serializers = _SERIALIZERS[cls] = _compile(cls)
+    return serializers
+
+
+def _getter(fields):
+    if len(fields) == 1:
+        return lambda obj: (getattr(obj, fields[0]),)
+    return attrgetter(*fields)
+
+
+def _compile(cls):
+    fields = tuple(cls.FIELDS)
+    get_values = _getter(fields)
+    # the fields held by instances, not derived by a property
+    stored = tuple(f for f in fields if not isinstance(getattr(cls, f, None), property))
+    get_stored = _getter(stored)
+    nested = [(i, field, cls.NESTED[field]) for i, field in enumerate(stored) if field in cls.NESTED]
+
+    if not nested:
+        def to_dict(obj):
+            return dict(zip(fields, get_values(obj)))
+
+        to_flat_dict = to_dict
+
+        def to_values(obj):
+            return list(get_stored(obj))
+    else:
+        def to_dict(obj):
+            result = dict(zip(fields, get_values(obj)))
+            for _, field, _ in nested:
+                value = result[field]
+                if value is not None:
+                    result[field] = value.to_dict()
+            return result
+
+        def to_flat_dict(obj):
+            result = {}
+            for field, value in zip(fields, get_values(obj)):
+                if field in cls.NESTED and value is not None:
+                    for key, nested_value in value.to_dict(flatten=True).items():
+                        result[f"{field}_{key}"] = nested_value
+                else:
+                    result[field] = value
+            return result
+
+        def to_values(obj):
+            values = list(get_stored(obj))
+            for i, _, _ in nested:
+                if values[i] is not None:
+                    values[i] = _compiled(type(values[i]))[2](values[i])
+            return values
+
+    def from_values(values):
+        obj = cls.__new__(cls)
+        for i, field, nested_cls in nested:
+            if values[i] is not None:
+                values[i] = _compiled(nested_cls)[3](values[i])
+        for field, value in zip(stored, values):
+            object.__setattr__(obj, field, value)
+        return obj
+
+    return to_dict, to_flat_dict, to_values, from_values
@@ -1,13 +1,17 @@
 import json
-import os
+import time
+from operator import itemgetter
 from typing import List
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 
 # custom
 from settings import DATA_DIR, CONTANT_DIR
 from models.base import PythonDictObject
+from models.store import CandleStore, CANDLE_DTYPES, CANDLE_DF_COLUMNS
+from constants.intervals import bar_open, interval_ms
 
 
 class Candle(PythonDictObject):
@@ -24,6 +28,9 @@ class Candle(PythonDictObject):
     'v': '0.42952'},
     """
 
+    FIELDS = ("s", "t", "T", "i", "n", "c", "h", "l", "o", "v", "end_time", "start_time")
+    __slots__ = FIELDS[:-2]
+
     def __init__(
         self,
         T: int,
@@ -47,12 +54,15 @@ class Candle(PythonDictObject):
         self.l = l  # low
         self.o = o  # open
         self.v = v  # volume
-        self.end_time = datetime.utcfromtimestamp(self.T / 1000).strftime(
-            "%Y-%m-%d-%H:%M:%S"
-        )
-        self.start_time = datetime.utcfromtimestamp(self.t / 1000).strftime(
-            "%Y-%m-%d-%H:%M:%S"
-        )
+
+    # derived from t and T on access, rather than stored per candle
+    @property
+    def end_time(self):
+        return time.strftime("%Y-%m-%d-%H:%M:%S", time.gmtime(self.T // 1000))
+
+    @property
+    def start_time(self):
+        return time.strftime("%Y-%m-%d-%H:%M:%S", time.gmtime(self.t // 1000))
 
     @classmethod
     def from_dict(cls, dict_representation):
@@ -78,34 +88,157 @@ class Candle(PythonDictObject):
         )
 
 
+TIME_FORMAT = "%Y-%m-%d-%H:%M:%S"
+
+
+def format_times(ms):
+    """Millisecond timestamps to Candle time strings, vectorized."""
+    times = np.datetime_as_string(np.asarray(ms, dtype="datetime64[ms]").astype("datetime64[s]"))
+    return np.char.replace(times, "T", "-").astype(object)
+
+
+def decode_candles(res):
+    """
+    Decode a candles_snapshot response into typed {column: array}
+    (see store.CANDLE_DTYPES), parsing the price strings in bulk.
+    """
+    if len(res) == 0:
+        return {col: np.empty(0, dtype=dtype) for col, dtype in CANDLE_DTYPES.items()}
+    fields = zip(*map(itemgetter(*CANDLE_DTYPES), res))
+    return {
+        col: np.array(values, dtype=dtype)
+        for (col, dtype), values in zip(CANDLE_DTYPES.items(), fields)
+    }
+
+
 class CandleList(PythonDictObject):
+    """
+    Candles of one symbol and interval, held as typed columns.
+    Candle objects are only built when `candles` is asked for.
+    """
+
     def __init__(self, candles: List[Candle]):
         if len(candles) == 0:
             raise ValueError("Candle list cannot be empty")
-        self.candles = candles
-        self.symbol = self.candles[0].s
-        self.interval = self.candles[0].i  
-        self.start_time = self.candles[0].start_time
-        self.end_time = self.candles[-1].end_time
-        self.number_of_candles = len(self.candles)
+        self._candles = candles
+        self._columns = None
+        self._response = None
+        self._init_meta(self.candles[0].s, self.candles[0].i)
+
+    @classmethod
+    def from_columns(cls, symbol, interval, columns, response=None):
+        """Build from typed {column: array}, without Candle objects."""
+        if len(columns["t"]) == 0:
+            raise ValueError("Candle list cannot be empty")
+        candle_list = cls.__new__(cls)
+        candle_list._candles = None
+        candle_list._columns = columns
+        candle_list._response = response
+        candle_list._init_meta(symbol, interval)
+        return candle_list
+
+    def _init_meta(self, symbol, interval):
+        self.symbol = symbol
+        self.interval = interval
+        t, T = self.columns["t"], self.columns["T"]
+        self.start_time = datetime.utcfromtimestamp(t[0] / 1000).strftime(TIME_FORMAT)
+        self.end_time = datetime.utcfromtimestamp(T[-1] / 1000).strftime(TIME_FORMAT)
+        self.number_of_candles = len(t)
+
+    @property
+    def columns(self):
+        """The candles as typed {column: array}, see store.CANDLE_DTYPES."""
+        if self._columns is None:
+            self._columns = {
+                col: np.array([getattr(candle, col) for candle in self._candles], dtype=dtype)
+                for col, dtype in CANDLE_DTYPES.items()
+            }
+        return self._columns
+
+    @property
+    def candles(self):
+        if self._candles is None:
+            if self._response is not None:
+                self._candles = [Candle(**candle) for candle in self._response]
+            else:
+                c = self.columns
+                self._candles = [
+                    Candle(
+                        T=int(c["T"][i]),
+                        c=str(c["c"][i]),
+                        h=str(c["h"][i]),
+                        i=self.interval,
+                        l=str(c["l"][i]),
+                        n=int(c["n"][i]),
+                        o=str(c["o"][i]),
+                        s=self.symbol,
+                        t=int(c["t"][i]),
+                        v=str(c["v"][i]),
+                    )
+                    for i in range(self.number_of_candles)
+                ]
+        return self._candles
+
+    def to_dict(self, flatten=False):
+        result = {
+            "candles": [candle.to_dict(flatten) for candle in self.candles],
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "number_of_candles": self.number_of_candles,
+        }
+        return self._flatten_dict(result) if flatten else result
 
     ########## Methods ##########
     def to_df(self):
-        # Convert coin's attributes to a Series
-        data = [candle.to_series() for candle in self.candles]
-        return pd.DataFrame(data)
+        c = self.columns
+        n = self.number_of_candles
+        start_time = format_times(c["t"])
+        return pd.DataFrame(
+            {
+                "symbol": np.full(n, self.symbol, dtype=object),
+                "datetime": start_time,
+                "start_time": start_time,
+                "end_time": format_times(c["T"]),
+                "interval": np.full(n, self.interval, dtype=object),
+                "number_of_trades": c["n"],
+                "close": c["c"],
+                "high": c["h"],
+                "low": c["l"],
+                "open": c["o"],
+                "volume": c["v"],
+                "tic": c["t"],
+                "toc": c["T"],
+            }
+        )
 
     @classmethod
     def from_df(cls, df):
+        """Build from the to_df layout, or from raw candle fields (t, T, o, ...)."""
+        if "tic" in df.columns:
+            columns = {
+                col: df[CANDLE_DF_COLUMNS[col]].to_numpy(dtype=dtype)
+                for col, dtype in CANDLE_DTYPES.items()
+            }
+            return cls.from_columns(df["symbol"].iloc[0], df["interval"].iloc[0], columns)
         candles = [Candle.from_dict(candle) for candle in df.to_dict(orient="records")]
         return cls(candles=candles)
 
     @classmethod
     def from_response(cls, res):
-        return cls(candles=[Candle(**candle) for candle in res])
+        if len(res) == 0:
+            raise ValueError("Candle list cannot be empty")
+        return cls.from_columns(res[0]["s"], res[0]["i"], decode_candles(res), response=res)
 
     ########## storage ##########
+    def to_store(self, store: CandleStore = None):
+        """Merge the candles into the columnar candle store."""
+        store = store or CandleStore()
+        return store.append(self.symbol, self.interval, self.columns)
+
     def to_csv(self, file_name: str = None):
+        """Export the candles to DATA_DIR/file_name, for the notebooks."""
         if file_name is None:
             file_name = f"{self.symbol}.csv"
 
@@ -113,39 +246,45 @@ class CandleList(PythonDictObject):
         file_path = DATA_DIR / file_name
         df.to_csv(file_path, index=False)
 
-        ### Get the current date and time
-        now = datetime.now()
-        # Format the date and time as a string
-        # dt = now.strftime("%Y-%m-%d-%H:%M:%S")
-        # dt = now.strftime("%Y-%m-%d")
-        data_range = f"{self.start_time}{self.end_time}"
-        file_path_2 = DATA_DIR / data_range / file_name
-        if not (DATA_DIR / f"{data_range}").exists():
-            (DATA_DIR / f"{data_range}").mkdir(parents=True, exist_ok=True)
-        df.to_csv(file_path_2, index=False)
-
         return f"Candles exported to {file_path}"
 
     @classmethod
-    def save_fetch(cls, info, symbol, interval, start, end, file_name=None):
-        if file_name is None:
-            file_name = f"{symbol}.csv"
-        start_time = datetime.utcfromtimestamp(start / 1000).strftime(
-            "%Y-%m-%d-%H:%M:%S"
-        )
-        end_time = datetime.utcfromtimestamp(end / 1000).strftime(
-            "%Y-%m-%d-%H:%M:%S"
-        )
-
-        data_range = f"{start_time}{end_time}"
-        file_path_2 = DATA_DIR / data_range / file_name
-        if os.path.exists(file_path_2):
-            return cls.from_csv(file_path_2)
-        else:
-            result =  info.candles_snapshot(symbol, interval, start, end)
-            candles = cls.from_response(result)
-            return candles  
+    def save_fetch(cls, info, symbol, interval, start, end, file_name=None, store=None):
+        """
+        Candles of symbol with start <= t < end, served from the candle store.
+        Only the spans the store has not covered yet are fetched and merged in.
+        file_name: unused, kept for older calls
+        """
+        store = store or CandleStore()
+        # bars opening from here on are not closed yet, fetch them again next time
+        closed = bar_open(int(time.time() * 1000), interval)
+        for gap_start, gap_end in store.missing(symbol, interval, start, end):
+            columns = cls.fetch_columns(info, symbol, interval, gap_start, gap_end)
+            store.append(symbol, interval, columns)
+            if min(gap_end, closed) > gap_start:
+                store.add_coverage(symbol, interval, gap_start, min(gap_end, closed))
+        return cls.from_columns(symbol, interval, store.read(symbol, interval, start, end))
 
+    @staticmethod
+    def fetch_columns(info, symbol, interval, start, end):
+        """
+        Fetch the candles with start <= t < end as typed columns, following
+        up when the snapshot stops short of the range.
+        """
+        parts = []
+        while start < end:
+            columns = decode_candles(info.candles_snapshot(symbol, interval, start, end - 1))
+            if not len(columns["t"]):
+                break
+            parts.append(columns)
+            next_start = int(columns["t"][-1]) + interval_ms(interval)
+            if next_start <= start:
+                break
+            start = next_start
+        return {
+            col: np.concatenate([part[col] for part in parts]) if parts else np.empty(0, dtype=dtype)
+            for col, dtype in CANDLE_DTYPES.items()
+        }
 
     @classmethod
     def from_csv(cls, file_name: str = None, symbol: str = None):
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+
+def _compact(codes, positions, values, n_symbols):
+    """(row, symbol) matrix of each symbol's values from row 0, NaN after its last."""
+    compact = np.full((positions.max() + 1, n_symbols), np.nan)
+    compact[positions, codes] = values
+    return compact
+
+
+def _ema_area(compact, span, window):
+    """
+    EMA, area and rolling area sum of every column of a compact matrix,
+    each in one pandas pass over all columns.
+    """
+    ema = pd.DataFrame(compact).ewm(span=span, adjust=False).mean().to_numpy()
+    ema[np.isnan(compact)] = np.nan
+    area = compact - ema
+    area_sum = pd.DataFrame(area).rolling(window).sum().to_numpy()
+    return ema, area, area_sum
+
+
+class EmaArea:
+    """
+    Area between the close and its EMA, as ranked by the
+    rank_by_ema200_area_under_curve notebook:
+
+        ema            close.ewm(span, adjust=False).mean()
+        area           close - ema
+        norm_area      area / mean of the symbol's ema
+        sum_norm_area  rolling `window` sum of norm_area
+
+    per symbol, over the symbol's own bars (missing bars are skipped, not
+    counted in the window). fit computes the whole history of all symbols
+    at once; update then advances one bar in O(symbols) from the kept
+    state: the last EMA, the running EMA sum, the last `window` areas of
+    every symbol and their running sum. Like RollingWindow, the area sum
+    is recomputed from the buffer each time a symbol's buffer wraps
+    around, which bounds the rounding drift.
+
+    Like the notebook, norm_area is normalized by the mean EMA over the
+    symbol's whole history, which moves with every new bar; the rolling
+    sums are kept unnormalized and divided on read.
+    """
+
+    def __init__(self, symbols, span=200, window=180):
+        if span < 1 or window < 1:
+            raise ValueError(f"Invalid span / window: {span} / {window}")
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.span = span
+        self.window = window
+        self.alpha = 2 / (span + 1)
+
+        n = len(self.symbols)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.ema = np.full(n, np.nan)
+        self._ema_sum = np.zeros(n)
+        self._areas = np.zeros((n, window))
+        self._area_sum = np.zeros(n)
+
+    ########## batch ##########
+    def fit(self, close, mask=None):
+        """
+        Compute the history of (symbol, time) closes (NaN or mask False
+        where a symbol has no bar), e.g. panel.field("close") and
+        panel.mask, and keep the state for update.
+        Returns {ema, area, norm_area, sum_norm_area} (symbol, time) arrays.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        valid = ~np.isnan(close) if mask is None else np.asarray(mask) & ~np.isnan(close)
+        symbol_index, time_index = np.nonzero(valid)
+        positions = (np.cumsum(valid, axis=1) - 1)[symbol_index, time_index]
+        result = self._fit(symbol_index, positions, close[symbol_index, time_index])
+
+        out = {}
+        for name, values in result.items():
+            out[name] = np.full(close.shape, np.nan)
+            out[name][symbol_index, time_index] = values
+        return out
+
+    def fit_frame(self, df, symbol_column="symbol", close_column="close"):
+        """
+        calculate_normalized_area_under_ema200 of the notebook: a copy of a
+        long frame, each symbol's rows in time order, with the ema<span>,
+        area, norm_area and sum_norm_area columns added.
+        """
+        codes = pd.Categorical(df[symbol_column], categories=self.symbols).codes
+        if (codes < 0).any():
+            raise ValueError(f"Unknown symbols: {sorted(set(df[symbol_column]) - set(self.symbols))}")
+        positions = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        result = self._fit(codes, positions, df[close_column].to_numpy(dtype=np.float64))
+
+        df = df.copy()
+        df[f"ema{self.span}"] = result.pop("ema")
+        for name, values in result.items():
+            df[name] = values
+        return df
+
+    def _fit(self, codes, positions, values):
+        if not len(values):
+            raise ValueError("No bars to fit")
+        compact = _compact(codes, positions, values, len(self.symbols))
+        ema, area, area_sum = _ema_area(compact, self.span, self.window)
+
+        # keep the state of the last bar of every symbol
+        self.count = (~np.isnan(compact)).sum(axis=0)
+        self._ema_sum = np.nansum(ema, axis=0)
+        self.ema = np.where(
+            self.count > 0, ema[np.maximum(self.count - 1, 0), np.arange(len(self.symbols))], np.nan
+        )
+        rows = self.count[:, np.newaxis] - self.window + np.arange(self.window)
+        symbol_index, offset = np.nonzero(rows >= 0)
+        rows = rows[symbol_index, offset]
+        self._areas = np.zeros((len(self.symbols), self.window))
+        self._areas[symbol_index, rows % self.window] = area[rows, symbol_index]
+        self._area_sum = self._areas.sum(axis=1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ema_mean = self._ema_sum / self.count
+        return {
+            "ema": ema[positions, codes],
+            "area": area[positions, codes],
+            "norm_area": (area / ema_mean)[positions, codes],
+            "sum_norm_area": (area_sum / ema_mean)[positions, codes],
+        }
+
+    ########## incremental ##########
+    def update(self, close):
+        """
+        Advance the symbols by one bar, close aligned with self.symbols (NaN
+        for a symbol without a new bar). Returns the latest sum_norm_area.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        valid = ~np.isnan(close)
+        first = valid & (self.count == 0)
+        ema = np.where(first, close, self.alpha * close + (1 - self.alpha) * self.ema)
+        self.ema = np.where(valid, ema, self.ema)
+
+        index = np.flatnonzero(valid)
+        slot = self.count[index] % self.window
+        area = close[index] - self.ema[index]
+        self._area_sum[index] += area - self._areas[index, slot]
+        self._areas[index, slot] = area
+        self._ema_sum[index] += self.ema[index]
+        self.count[index] += 1
+
+        wrapped = index[slot == self.window - 1]
+        if len(wrapped):
+            self._area_sum[wrapped] = self._areas[wrapped].sum(axis=1)
+        return self.sum_norm_area()
+
+    def sum_norm_area(self):
+        """Latest sum_norm_area of every symbol, NaN until `window` bars."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ema_mean = self._ema_sum / self.count
+            return np.where(self.count >= self.window, self._area_sum / ema_mean, np.nan)
+
+    def rank(self):
+        """
+        rank_symbols_by_area of the notebook on the latest bars: symbols
+        by sum_norm_area, descending, with its dense rank.
+        """
+        latest = pd.Series(self.sum_norm_area(), index=self.symbols, name="sum_norm_area").dropna()
+        latest = latest.sort_values(ascending=False, kind="stable")
+        return pd.DataFrame(
+            {
+                "symbol": latest.index,
+                "sum_norm_area": latest.to_numpy(),
+                "rank": latest.rank(method="dense", ascending=False).to_numpy(),
+            }
+        )
@@ -0,0 +1,75 @@
+import numpy as np
+
+from models.indicators import RollingWindow
+
+# 7 days of 15m bars
+FEATURE_WINDOW = 7 * 24 * 4
+
+FEATURES = (
+    "pct_change",
+    "rolling_accumulated_pct_change",
+    "rolling_variance_pct_change",
+)
+
+
+class RollingFeatures:
+    """
+    The prepare_data features of the ranking notebook, kept as running
+    state for many symbols on one bar clock:
+
+        pct_change                      close / previous close - 1
+        rolling_accumulated_pct_change  (prod(1 + pct_change / 100) - 1) * 100
+        rolling_variance_pct_change     variance of the pct_change
+
+    over the last `window` bars, skipping NaNs like the notebook's
+    rolling(window, min_periods=1) does.
+
+    Each update is O(1) per symbol: the variance comes from a RollingWindow
+    of the changes and the product from one of their log1p, summed.
+    A symbol without a bar (NaN close) gets a NaN change, and its next
+    change is from its last close.
+    The latest features are in `values`, a contiguous (feature, symbol)
+    float64 array updated in place, its rows ready for
+    CrossSectionalRanker.add through `as_dict`.
+    """
+
+    def __init__(self, symbols, window=FEATURE_WINDOW):
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        n = len(self.symbols)
+        self.close = np.full(n, np.nan)
+        self.values = np.full((len(FEATURES), n), np.nan)
+        self._changes = RollingWindow(window, shape=n, min_periods=1)
+        self._growth = RollingWindow(window, shape=n, min_periods=1)
+
+    def __getitem__(self, feature):
+        return self.values[FEATURES.index(feature)]
+
+    def as_dict(self):
+        return {feature: self.values[i] for i, feature in enumerate(FEATURES)}
+
+    def update(self, close):
+        """Push the next closes, aligned with self.symbols; returns `values`."""
+        close = np.asarray(close, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change = close / self.close - 1
+        self.close = np.where(np.isnan(close), self.close, close)
+        self._changes.push(change)
+        self._growth.push(np.log1p(change / 100))
+
+        self.values[0] = change
+        self.values[1] = np.expm1(self._growth.sum) * 100
+        self.values[2] = self._changes.var()
+        return self.values
+
+    def extend(self, closes):
+        """
+        Push (symbol, time) closes bar by bar, e.g. to warm up from
+        history. Returns the (time, feature, symbol) features of every bar.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        history = np.empty((closes.shape[1], len(FEATURES), len(self.symbols)))
+        for t in range(closes.shape[1]):
+            history[t] = self.update(closes[:, t])
+        return history
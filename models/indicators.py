@@ -0,0 +1,318 @@
+import hashlib
+import inspect
+import math
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+class RollingWindow:
+    """
+    Rolling mean / variance over the last `window` values of one or many streams.
+
+    Values live in a ring buffer and the statistics are kept as running
+    mean and sum of squared deviations (Welford), so each push is O(1) per
+    stream. NaNs are skipped like pandas does; a statistic is NaN until
+    `min_periods` valid values are in the window.
+    The running sums are recomputed from the buffer every time it wraps
+    around, which bounds the rounding drift at amortized O(1) cost.
+    A single stream (shape=()) runs on plain floats, without numpy overhead.
+    """
+
+    def __init__(self, window, shape=(), min_periods=None):
+        if window < 1:
+            raise ValueError(f"Invalid window: {window}")
+        self.window = window
+        self.shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        self.min_periods = window if min_periods is None else min_periods
+
+        self._position = 0
+        self.length = 0  # number of pushes
+        if self.shape == ():
+            self._buffer = [math.nan] * window
+            self._count = 0
+            self._mean = 0.0
+            self._m2 = 0.0
+        else:
+            self._buffer = np.full((window, *self.shape), np.nan)
+            self._count = np.zeros(self.shape, dtype=np.int64)
+            self._mean = np.zeros(self.shape)
+            self._m2 = np.zeros(self.shape)
+
+    def push(self, values):
+        """Add the next value of every stream, dropping the oldest one."""
+        if self.shape == ():
+            self._push_scalar(float(values))
+            return
+
+        values = np.asarray(values, dtype=np.float64)
+        leaving = self._buffer[self._position].copy()
+        self._buffer[self._position] = values
+        self._position = (self._position + 1) % self.window
+        self.length += 1
+
+        # remove the value leaving the window
+        removing = ~np.isnan(leaving)
+        if np.any(removing):
+            count = self._count - removing
+            delta = np.where(removing, leaving - self._mean, 0.0)
+            mean = np.where(
+                count > 0, self._mean - delta / np.maximum(count, 1), 0.0
+            )
+            self._m2 = np.where(
+                count > 0, self._m2 - delta * np.where(removing, leaving - mean, 0.0), 0.0
+            )
+            self._mean = mean
+            self._count = count
+
+        # add the new value
+        adding = ~np.isnan(values)
+        if np.any(adding):
+            self._count = self._count + adding
+            delta = np.where(adding, values - self._mean, 0.0)
+            self._mean = self._mean + delta / np.maximum(self._count, 1)
+            self._m2 = self._m2 + delta * np.where(adding, values - self._mean, 0.0)
+
+        if self._position == 0:
+            self._recompute()
+
+    def _push_scalar(self, value):
+        leaving = self._buffer[self._position]
+        self._buffer[self._position] = value
+        self._position = (self._position + 1) % self.window
+        self.length += 1
+
+        if leaving == leaving:  # not NaN
+            self._count -= 1
+            if self._count > 0:
+                delta = leaving - self._mean
+                self._mean -= delta / self._count
+                self._m2 -= delta * (leaving - self._mean)
+            else:
+                self._mean = 0.0
+                self._m2 = 0.0
+
+        if value == value:  # not NaN
+            self._count += 1
+            delta = value - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (value - self._mean)
+
+        if self._position == 0:
+            self._recompute_scalar()
+
+    def _recompute_scalar(self):
+        valid = [value for value in self._buffer if value == value]
+        self._count = len(valid)
+        self._mean = math.fsum(valid) / self._count if valid else 0.0
+        self._m2 = math.fsum((value - self._mean) ** 2 for value in valid)
+
+    def _recompute(self):
+        valid = ~np.isnan(self._buffer)
+        count = valid.sum(axis=0)
+        total = np.where(valid, self._buffer, 0.0).sum(axis=0)
+        mean = np.where(count > 0, total / np.maximum(count, 1), 0.0)
+        deviation = np.where(valid, self._buffer - mean, 0.0)
+        self._count = count
+        self._mean = mean
+        self._m2 = (deviation * deviation).sum(axis=0)
+
+    @property
+    def count(self):
+        """Number of valid values in the window."""
+        return self._count
+
+    @property
+    def ready(self):
+        return self._count >= self.min_periods
+
+    @property
+    def mean(self):
+        if self.shape == ():
+            return self._mean if self.ready else math.nan
+        return np.where(self.ready, self._mean, np.nan)
+
+    @property
+    def sum(self):
+        if self.shape == ():
+            return self._mean * self._count if self.ready else math.nan
+        return np.where(self.ready, self._mean * self._count, np.nan)
+
+    def var(self, ddof=1):
+        if self.shape == ():
+            if not self.ready or self._count <= ddof:
+                return math.nan
+            return max(self._m2, 0.0) / (self._count - ddof)
+        defined = self.ready & (self._count > ddof)
+        var = np.maximum(self._m2, 0.0) / np.maximum(self._count - ddof, 1)
+        return np.where(defined, var, np.nan)
+
+    def std(self, ddof=1):
+        if self.shape == ():
+            return math.sqrt(self.var(ddof=ddof))
+        return np.sqrt(self.var(ddof=ddof))
+
+
+class StreamingBollingerBands:
+    """
+    Bollinger Bands updated in O(1) per close, matching
+    close.rolling(window).mean() +/- k * close.rolling(window).std()
+    """
+
+    def __init__(self, window=20, k=2):
+        self.window = window
+        self.k = k
+        self.rolling = RollingWindow(window)
+        self.middle = np.nan
+        self.upper = np.nan
+        self.lower = np.nan
+        self.std = np.nan
+
+    def update(self, close):
+        """Push the next close and return (middle, upper, lower)."""
+        self.rolling.push(close)
+        self.middle = self.rolling.mean
+        self.std = self.rolling.std()
+        self.upper = self.middle + (self.std * self.k)
+        self.lower = self.middle - (self.std * self.k)
+        return self.middle, self.upper, self.lower
+
+
+########## memoized indicators ##########
+# name -> (function, signature); see register
+INDICATORS = {}
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def register(name):
+    """
+    Register an indicator under name. It is called as
+    fn(compute, close, **params), compute(name, **params) giving another
+    indicator of the same close through the cache.
+    """
+
+    def decorator(fn):
+        INDICATORS[name] = (fn, inspect.signature(fn))
+        return fn
+
+    return decorator
+
+
+@register("sma")
+def sma(compute, close, window=20):
+    return pd.Series(close).rolling(window=window).mean().to_numpy()
+
+
+@register("std")
+def rolling_std(compute, close, window=20):
+    return pd.Series(close).rolling(window=window).std().to_numpy()
+
+
+@register("ema")
+def ema(compute, close, span=200):
+    return pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+@register("bollinger")
+def bollinger(compute, close, window=20, k=2):
+    """(middle, upper, lower, std)"""
+    middle = compute("sma", window=window)
+    std = compute("std", window=window)
+    return middle, middle + (std * k), middle - (std * k), std
+
+
+@register("macd")
+def macd(compute, close, fast=12, slow=26, signal=9):
+    """(macd, signal, histogram)"""
+    line = compute("ema", span=fast) - compute("ema", span=slow)
+    signal_line = pd.Series(line).ewm(span=signal, adjust=False).mean().to_numpy()
+    return line, signal_line, line - signal_line
+
+
+@register("rsi")
+def rsi(compute, close, period=14):
+    """Wilder's RSI, NaN for the first `period` closes."""
+    delta = pd.Series(close).diff()
+    average = dict(alpha=1 / period, adjust=False, min_periods=period)
+    gain = delta.clip(lower=0).ewm(**average).mean().to_numpy()
+    loss = (-delta.clip(upper=0)).ewm(**average).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+
+
+def fingerprint(close):
+    """Version of a close series from its content, for callers without one."""
+    return hashlib.blake2b(np.ascontiguousarray(close).tobytes(), digest_size=16).hexdigest()
+
+
+class IndicatorCache:
+    """
+    LRU cache of indicator results, keyed by
+    (symbol, interval, data version, indicator, params), so that sweeps,
+    rankings and strategies computing the same indicator of the same data
+    share one result. Params are keyed with their defaults applied.
+    Without a version, the close series is fingerprinted.
+
+    Results are read-only arrays (or tuples of them) shared by every
+    caller. At most `maxsize` results are kept, the least recently used
+    is evicted first.
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError(f"Invalid maxsize: {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def __len__(self):
+        return len(self._results)
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._results))
+
+    def clear(self):
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def compute(self, name, close, symbol=None, interval=None, version=None, **params):
+        close = np.asarray(close, dtype=np.float64)
+        if version is None:
+            version = fingerprint(close)
+        return self._compute(name, close, (symbol, interval, version), params)
+
+    def _compute(self, name, close, series, params):
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        fn, signature = INDICATORS[name]
+        bound = signature.bind(None, close, **params)
+        bound.apply_defaults()
+        key = (*series, name, tuple(bound.arguments.items())[2:])
+
+        result = self._results.get(key)
+        if result is not None:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = fn(lambda other, **p: self._compute(other, close, series, p), close, **params)
+        for array in result if isinstance(result, tuple) else (result,):
+            array.setflags(write=False)
+        self._results[key] = result
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+
+# shared by everything computing indicators in this process
+INDICATOR_CACHE = IndicatorCache()
+
+
+def indicator(name, close, symbol=None, interval=None, version=None, **params):
+    """indicator("bollinger", close, window=20, k=2) through the shared cache."""
+    return INDICATOR_CACHE.compute(name, close, symbol=symbol, interval=interval, version=version, **params)
@@ -1,6 +1,7 @@
 import json
 from typing import List
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 # custom
@@ -8,6 +9,19 @@ from settings import DATA_DIR, CONTANT_DIR
 from models.base import PythonDictObject
 
 class MarketData(PythonDictObject):
+    FIELDS = (
+        "dayNtlVlm",
+        "funding",
+        "impactPxs",
+        "markPx",
+        "midPx",
+        "openInterest",
+        "oraclePx",
+        "premium",
+        "prevDayPx",
+    )
+    __slots__ = FIELDS
+
     def __init__(
         self,
         dayNtlVlm: str,
@@ -51,6 +65,10 @@ class MarketData(PythonDictObject):
         return pd.Series(data)
 
 class Coin(PythonDictObject):
+    FIELDS = ("maxLeverage", "name", "onlyIsolated", "szDecimals", "marketData")
+    NESTED = {"marketData": MarketData}
+    __slots__ = FIELDS
+
     def __init__(
         self,
         maxLeverage: int,
@@ -87,16 +105,88 @@ class Coin(PythonDictObject):
         data.update(self.marketData.to_series())
         return pd.Series(data)
 
+UNIVERSE_DTYPES = {
+    "maxLeverage": np.int64,
+    "name": object,
+    "onlyIsolated": bool,
+    "szDecimals": np.int64,
+}
+MARKET_DATA_FIELDS = MarketData.FIELDS
+
+
+def decode_market(res):
+    """
+    Decode a metaAndAssetCtxs response into {column: array}, one row per
+    coin: the universe fields typed as UNIVERSE_DTYPES, the market data as
+    float64 and impactPxs as an object column, NaN where missing.
+    """
+    universe, ctxs = res[0]["universe"], res[1]
+    n = min(len(universe), len(ctxs))
+    columns = {}
+    for field, dtype in UNIVERSE_DTYPES.items():
+        values = [u[field] for u in universe[:n]]
+        columns[field] = np.array(values, dtype=dtype) if n else np.empty(0, dtype=dtype)
+    for field in MARKET_DATA_FIELDS:
+        if field == "impactPxs":
+            values = np.empty(n, dtype=object)
+            values[:] = [ctx.get(field) or np.nan for ctx in ctxs[:n]]
+        else:
+            values = np.array([ctx.get(field) or "nan" for ctx in ctxs[:n]], dtype=np.float64)
+        columns[field] = values
+    return columns
+
+
+def _market_string(value):
+    """A float column value back to the response's string, None for NaN."""
+    return None if np.isnan(value) else str(value)
+
+
+def _market_impact(value):
+    return value if isinstance(value, list) else None
+
+
 class Market(PythonDictObject):
     """
         Keep track of a set of coins object
+        The market data is held as columns (see decode_market); Coin objects
+        are only built when `coins` is asked for.
     """
     def __init__(self, coins: dict[str, Coin]):
-        self.coins = coins
+        self._coins = coins
+        self._columns = None
+        self._response = None
+
+    @classmethod
+    def from_columns(cls, columns, response=None):
+        """Build from decode_market columns, without Coin objects."""
+        market = cls.__new__(cls)
+        market._coins = None
+        market._columns = columns
+        market._response = response
+        return market
+
+    @property
+    def coins(self):
+        if self._coins is None:
+            if self._response is not None:
+                self._coins = self._coins_from_response(self._response)
+            else:
+                self._coins = self._coins_from_columns(self._columns)
+        return self._coins
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = self._columns_from_coins(self._coins)
+        return self._columns
+
+    def to_dict(self, flatten=False):
+        result = {"coins": {name: coin.to_dict(flatten) for name, coin in self.coins.items()}}
+        return self._flatten_dict(result) if flatten else result
 
     ########## Methods ##########
     def export_coin_names(self):
-        coins = list(self.coins.keys())
+        coins = list(self.columns["name"])
         file_path = CONTANT_DIR / "coin_names.py"
         with open(file_path, "w") as file:
             file.write(f"from enum import Enum\n\n")
@@ -109,11 +199,14 @@ class Market(PythonDictObject):
         return self.coins[coin_name].to_dict()
 
     def to_df(self):
-        df = pd.DataFrame([coin.to_series() for coin in self.coins.values()])
-        return df
+        return pd.DataFrame(self.columns)
 
     @classmethod
-    def from_response(self, res):
+    def from_response(cls, res):
+        return cls.from_columns(decode_market(res), response=res)
+
+    @staticmethod
+    def _coins_from_response(res):
         coins = {}
         _universe: List = res[0]["universe"]
         _marketData: List = res[1]
@@ -136,7 +229,40 @@ class Market(PythonDictObject):
                 ),
             )
             coins[coin.name] = coin
-        return Market(coins)
+        return coins
+
+    @staticmethod
+    def _coins_from_columns(columns):
+        coins = {}
+        for i, name in enumerate(columns["name"]):
+            market_data = {
+                field: _market_impact(columns[field][i]) if field == "impactPxs" else _market_string(columns[field][i])
+                for field in MARKET_DATA_FIELDS
+            }
+            coins[name] = Coin(
+                int(columns["maxLeverage"][i]),
+                name,
+                bool(columns["onlyIsolated"][i]),
+                int(columns["szDecimals"][i]),
+                MarketData(**market_data),
+            )
+        return coins
+
+    @staticmethod
+    def _columns_from_coins(coins):
+        coins = list(coins.values())
+        columns = {
+            field: np.array([getattr(coin, field) for coin in coins], dtype=dtype)
+            for field, dtype in UNIVERSE_DTYPES.items()
+        }
+        for field in MARKET_DATA_FIELDS:
+            values = [getattr(coin.marketData, field) for coin in coins]
+            if field == "impactPxs":
+                columns[field] = np.empty(len(coins), dtype=object)
+                columns[field][:] = [v or np.nan for v in values]
+            else:
+                columns[field] = np.array([v or "nan" for v in values], dtype=np.float64)
+        return columns
 
 
 
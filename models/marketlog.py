@@ -0,0 +1,141 @@
+import time
+from pathlib import Path
+
+import msgpack
+import numpy as np
+
+from settings import DATA_DIR
+
+# per-coin fields of a metaAndAssetCtxs snapshot; impactPxs is split in two
+LOG_FIELDS = (
+    "markPx",
+    "midPx",
+    "oraclePx",
+    "funding",
+    "premium",
+    "openInterest",
+    "dayNtlVlm",
+    "prevDayPx",
+    "impactBidPx",
+    "impactAskPx",
+)
+
+INDEX_DTYPE = np.dtype([("ts", "<i8"), ("offset", "<i8")])
+
+
+def snapshot_values(res):
+    """
+    Coin names and (coin, LOG_FIELDS) float64 values of a metaAndAssetCtxs
+    response, NaN where a value is missing.
+    """
+    universe, ctxs = res[0]["universe"], res[1]
+    values = np.full((len(universe), len(LOG_FIELDS)), np.nan)
+    for i, ctx in enumerate(ctxs):
+        row = values[i]
+        for j, field in enumerate(LOG_FIELDS[:-2]):
+            if ctx.get(field) is not None:
+                row[j] = float(ctx[field])
+        if ctx.get("impactPxs"):
+            row[-2:] = [float(px) for px in ctx["impactPxs"]]
+    return [u["name"] for u in universe], values
+
+
+class MarketLog:
+    """
+    Append-only log of market snapshots:
+
+        market.log  msgpack frames {ts, coins, values}, values being the
+                    (coin, LOG_FIELDS) float64 array as bytes
+        market.idx  one (ts, offset) int64 pair per frame
+
+    Loading a time range looks the offsets up in the index, reads the
+    frames in one read and stacks them into a (time, coin, field) array.
+    Each frame is decoded at its own indexed offset, so the bytes of a
+    frame whose index entry was never written (a crash in between) are
+    skipped.
+    """
+
+    def __init__(self, path=DATA_DIR / "market_log"):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.path / "market.log"
+        self.index_path = self.path / "market.idx"
+
+    def __len__(self):
+        if not self.index_path.exists():
+            return 0
+        return self.index_path.stat().st_size // INDEX_DTYPE.itemsize
+
+    def index(self):
+        if not self.index_path.exists():
+            return np.empty(0, dtype=INDEX_DTYPE)
+        return np.fromfile(self.index_path, dtype=INDEX_DTYPE)
+
+    ########## write ##########
+    def append(self, res, ts=None):
+        """Append a metaAndAssetCtxs response taken at ts (ms, now by default)."""
+        ts = int(time.time() * 1000) if ts is None else int(ts)
+        coins, values = snapshot_values(res)
+        frame = msgpack.packb({"ts": ts, "coins": coins, "values": values.astype("<f8").tobytes()})
+        with open(self.log_path, "ab") as log:
+            offset = log.tell()
+            log.write(frame)
+        # the index is written last, a frame without its entry is skipped by load
+        with open(self.index_path, "ab") as index:
+            index.write(np.array([(ts, offset)], dtype=INDEX_DTYPE).tobytes())
+        return ts
+
+    def record(self, info, every=60, count=None):
+        """
+        Take a metaAndAssetCtxs snapshot with info every `every` seconds,
+        count times or until interrupted.
+        """
+        taken = 0
+        while count is None or taken < count:
+            started = time.monotonic()
+            self.append(info.post("/info", {"type": "metaAndAssetCtxs"}))
+            taken += 1
+            if count is None or taken < count:
+                time.sleep(max(0.0, every - (time.monotonic() - started)))
+        return taken
+
+    ########## read ##########
+    def load(self, start=None, end=None):
+        """
+        Snapshots with start <= ts < end (ms, None for unbounded) as
+        (ts int64 (time,), coins list, values float64 (time, coin, field)).
+        Coins are in order of first appearance, NaN where a coin is absent.
+        """
+        index = self.index()
+        lo = 0 if start is None else np.searchsorted(index["ts"], start, side="left")
+        hi = len(index) if end is None else np.searchsorted(index["ts"], end, side="left")
+        if lo >= hi:
+            return np.empty(0, dtype=np.int64), [], np.empty((0, 0, len(LOG_FIELDS)))
+
+        first = index["offset"][lo]
+        last = index["offset"][hi] if hi < len(index) else None
+        with open(self.log_path, "rb") as log:
+            log.seek(first)
+            data = log.read() if last is None else log.read(last - first)
+
+        data = memoryview(data)
+        offsets = index["offset"][lo:hi] - first
+        ends = np.r_[offsets[1:], len(data)]
+        frames = []
+        for ts, offset, frame_end in zip(index["ts"][lo:hi], offsets, ends):
+            unpacker = msgpack.Unpacker(raw=False)
+            unpacker.feed(data[offset:frame_end])
+            frame = next(unpacker)
+            if frame["ts"] != ts:
+                raise ValueError(f"Corrupt market log: frame at {offset + first} has ts {frame['ts']}, index has {ts}")
+            frames.append(frame)
+
+        coin_ids = {}
+        for frame in frames:
+            for coin in frame["coins"]:
+                coin_ids.setdefault(coin, len(coin_ids))
+        values = np.full((len(frames), len(coin_ids), len(LOG_FIELDS)), np.nan)
+        for i, frame in enumerate(frames):
+            rows = np.frombuffer(frame["values"], dtype="<f8").reshape(-1, len(LOG_FIELDS))
+            values[i, [coin_ids[coin] for coin in frame["coins"]]] = rows
+        return index["ts"][lo:hi].copy(), list(coin_ids), values
@@ -0,0 +1,213 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from constants.intervals import bar_open, interval_ms
+from models.store import CandleStore, CANDLE_DF_COLUMNS
+
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def frame_bars(frames: dict):
+    """{symbol: DataFrame} in the CandleList.to_df layout to {symbol: (open times, (n, field) values)}."""
+    return {
+        symbol: (df["tic"].to_numpy(dtype=np.int64), df[list(PANEL_FIELDS)].to_numpy(dtype=np.float64))
+        for symbol, df in frames.items()
+    }
+
+
+def bar_grid(data, interval, start=None, end=None):
+    """
+    Open times of the interval's bars with start <= t < end, by default
+    from the first to the last bar of data; start is floored to a bar
+    (see bar_open).
+    """
+    step = interval_ms(interval)
+    if start is None:
+        start = min(int(t[0]) for t, _ in data.values() if len(t))
+    if end is None:
+        end = max(int(t[-1]) for t, _ in data.values() if len(t)) + step
+    start = bar_open(start, interval)
+    return np.arange(start, end, step, dtype=np.int64)
+
+
+def align_bars(data, times, step, values, mask):
+    """
+    Scatter every symbol's bars onto the grid in one pass: values
+    (symbol, time, field) and mask (symbol, time) are filled in place.
+    Of bars with the same open time the last one is kept; bars off the
+    grid or outside it are left out. Returns per-symbol counts:
+    {rows, duplicates, off_grid, out_of_range}.
+    """
+    n_symbols, n_times = len(data), len(times)
+    counts = np.array([len(t) for t, _ in data.values()], dtype=np.int64)
+    codes = np.repeat(np.arange(n_symbols), counts)
+    if counts.sum():
+        t = np.concatenate([np.asarray(t, dtype=np.int64) for t, _ in data.values()])
+        rows = np.concatenate([np.asarray(r, dtype=np.float64).reshape(len(r), -1) for _, r in data.values()])
+    else:
+        t, rows = np.empty(0, dtype=np.int64), np.empty((0, values.shape[2]))
+
+    start = times[0] if n_times else 0
+    offset = t - start
+    in_range = (offset >= 0) & (offset < n_times * step)
+    on_grid = in_range & (offset % step == 0)
+    on_grid_rows = np.flatnonzero(on_grid)
+
+    # the last row landing in each (symbol, bar) cell
+    last = np.full(n_symbols * n_times, -1, dtype=np.int64)
+    np.maximum.at(last, codes[on_grid_rows] * n_times + offset[on_grid_rows] // step, on_grid_rows)
+    cells = np.flatnonzero(last >= 0)
+    symbol_index, time_index = np.divmod(cells, n_times)
+    values[symbol_index, time_index] = rows[last[cells]]
+    mask[symbol_index, time_index] = True
+
+    landed = np.bincount(codes[on_grid_rows], minlength=n_symbols)
+    return {
+        "rows": counts,
+        "duplicates": landed - np.bincount(symbol_index, minlength=n_symbols),
+        "off_grid": np.bincount(codes[in_range & ~on_grid], minlength=n_symbols),
+        "out_of_range": np.bincount(codes[~in_range], minlength=n_symbols),
+    }
+
+
+class Panel:
+    """
+    Candles of many symbols aligned on one bar grid:
+
+        values  float64 (symbol, time, field), NaN where a symbol has no bar
+        mask    bool (symbol, time), True where it has one
+        symbols, times (bar open times in ms), fields
+
+    On disk a panel is a directory with values.npy, mask.npy and times.npy,
+    written through np.lib.format.open_memmap, and index.json. Panel.open
+    maps them read-only, so slices are views and processes opening the same
+    panel share the pages instead of loading their own copy.
+    """
+
+    def __init__(self, values, mask, symbols, times, interval, fields=PANEL_FIELDS, path=None):
+        self.values = values
+        self.mask = mask
+        self.symbols = list(symbols)
+        self.times = times
+        self.interval = interval
+        self.fields = tuple(fields)
+        self.path = path
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __repr__(self):
+        return f"Panel({len(self.symbols)} symbols x {len(self.times)} {self.interval} bars x {self.fields})"
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def datetimes(self):
+        return self.times.astype("datetime64[ms]").astype("datetime64[ns]")
+
+    ########## build ##########
+    @classmethod
+    def from_store(cls, symbols, interval, start, end, path=None, store: CandleStore = None):
+        """Align the stored candles with start <= t < end of symbols."""
+        store = store or CandleStore()
+        names = {name: col for col, name in CANDLE_DF_COLUMNS.items()}
+        columns = {
+            symbol: store.read(symbol, interval, start, end, columns=["t", *(names[f] for f in PANEL_FIELDS)])
+            for symbol in symbols
+        }
+        return cls._build(
+            {
+                symbol: (c["t"], np.column_stack([c[names[f]] for f in PANEL_FIELDS]))
+                for symbol, c in columns.items()
+            },
+            interval,
+            start,
+            end,
+            path,
+        )
+
+    @classmethod
+    def from_frames(cls, frames: dict, interval, start=None, end=None, path=None):
+        """
+        Align {symbol: DataFrame} of candles, with their open time in ms in
+        `tic` and the PANEL_FIELDS columns (the CandleList.to_df layout).
+        """
+        return cls._build(frame_bars(frames), interval, start, end, path)
+
+    @classmethod
+    def _build(cls, data, interval, start, end, path):
+        """data: {symbol: (open times, (n, field) values)}; bars off the grid are dropped."""
+        times = bar_grid(data, interval, start, end)
+        shape = (len(data), len(times), len(PANEL_FIELDS))
+
+        if path is None:
+            values = np.full(shape, np.nan)
+            mask = np.zeros(shape[:2], dtype=bool)
+        else:
+            path = Path(path)
+            path.mkdir(parents=True, exist_ok=True)
+            values = np.lib.format.open_memmap(path / "values.npy", mode="w+", dtype=np.float64, shape=shape)
+            values[:] = np.nan
+            mask = np.lib.format.open_memmap(path / "mask.npy", mode="w+", dtype=bool, shape=shape[:2])
+            mask[:] = False
+
+        align_bars(data, times, interval_ms(interval), values, mask)
+
+        panel = cls(values, mask, data.keys(), times, interval, path=path)
+        if path is not None:
+            values.flush()
+            mask.flush()
+            np.save(path / "times.npy", times)
+            with open(path / "index.json", "w") as f:
+                json.dump({"symbols": panel.symbols, "interval": interval, "fields": PANEL_FIELDS}, f)
+            return cls.open(path)
+        return panel
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Map a panel directory; mode "r+" to write through to the files."""
+        path = Path(path)
+        with open(path / "index.json") as f:
+            index = json.load(f)
+        return cls(
+            np.load(path / "values.npy", mmap_mode=mode),
+            np.load(path / "mask.npy", mmap_mode=mode),
+            index["symbols"],
+            np.load(path / "times.npy"),
+            index["interval"],
+            fields=index["fields"],
+            path=path,
+        )
+
+    ########## slicing ##########
+    def field(self, name):
+        """(symbol, time) view of one field."""
+        return self.values[:, :, self.fields.index(name)]
+
+    def symbol(self, symbol):
+        """(time, field) view of one symbol."""
+        return self.values[self.symbol_ids[symbol]]
+
+    def time_slice(self, start=None, end=None):
+        """Panel view of the bars with start <= time < end (ms)."""
+        lo = 0 if start is None else np.searchsorted(self.times, start, side="left")
+        hi = len(self.times) if end is None else np.searchsorted(self.times, end, side="left")
+        return Panel(
+            self.values[:, lo:hi],
+            self.mask[:, lo:hi],
+            self.symbols,
+            self.times[lo:hi],
+            self.interval,
+            fields=self.fields,
+        )
+
+    def to_frame(self):
+        """The valid bars in long format: symbol, datetime and the fields."""
+        symbol_index, time_index = np.nonzero(self.mask)
+        df = pd.DataFrame(self.values[symbol_index, time_index], columns=list(self.fields))
+        df.insert(0, "symbol", np.asarray(self.symbols, dtype=object)[symbol_index])
+        df.insert(1, "datetime", self.datetimes[time_index])
+        return df
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from constants.intervals import interval_ms
+from models.panel import PANEL_FIELDS, Panel, align_bars, bar_grid, frame_bars
+
+FILL_POLICIES = ("mask", "ffill")
+
+
+def quality_report(symbols, times, mask, stats):
+    """
+    Per-symbol data quality of an aligned panel, from its mask and the
+    align_bars counts:
+
+        rows          bars given
+        duplicates    bars with the open time of another one (last kept)
+        off_grid      bars not opening on a bar boundary (dropped)
+        out_of_range  bars outside the grid (dropped)
+        bars          grid bars with data
+        first, last   first and last bar with data
+        leading       grid bars before the first one (e.g. listed later)
+        trailing      grid bars after the last one
+        missing       grid bars without data between first and last
+        gaps          runs of missing bars
+        longest_gap   bars in the longest run
+        coverage      bars / grid bars
+    """
+    n_times = mask.shape[1]
+    position = np.arange(n_times)
+    listed = mask.any(axis=1)
+    first = np.where(listed, mask.argmax(axis=1), n_times)
+    last = np.where(listed, n_times - 1 - mask[:, ::-1].argmax(axis=1), -1)
+
+    # length of the gap ending before each bar, from the previous bar with data
+    previous = np.maximum.accumulate(np.where(mask, position, -1), axis=1)
+    gap = np.where(mask[:, 1:] & (previous[:, :-1] >= 0), position[1:] - previous[:, :-1] - 1, 0)
+
+    datetimes = pd.to_datetime(times, unit="ms")
+    report = pd.DataFrame(
+        {
+            **stats,
+            "bars": mask.sum(axis=1),
+            "first": datetimes[np.minimum(first, n_times - 1)].where(listed),
+            "last": datetimes[np.maximum(last, 0)].where(listed),
+            "leading": np.where(listed, first, n_times),
+            "trailing": np.where(listed, n_times - 1 - last, 0),
+            "missing": gap.sum(axis=1),
+            "gaps": (gap > 0).sum(axis=1),
+            "longest_gap": gap.max(axis=1, initial=0),
+        },
+        index=pd.Index(symbols, name="symbol"),
+    )
+    report["coverage"] = report["bars"] / max(n_times, 1)
+    return report
+
+
+def fill_forward(values, mask, fields=PANEL_FIELDS):
+    """
+    Fill the missing bars between a symbol's first and last bar, in place,
+    with flat bars at the previous close and no volume.
+    Returns the (symbol, time) mask of the filled bars.
+    """
+    position = np.arange(mask.shape[1])
+    previous = np.maximum.accumulate(np.where(mask, position, -1), axis=1)
+    following = np.minimum.accumulate(np.where(mask, position, mask.shape[1])[:, ::-1], axis=1)[:, ::-1]
+    filled = ~mask & (previous >= 0) & (following < mask.shape[1])
+
+    symbol_index, time_index = np.nonzero(filled)
+    close = values[symbol_index, previous[symbol_index, time_index], fields.index("close")]
+    for i, field in enumerate(fields):
+        values[symbol_index, time_index, i] = 0.0 if field == "volume" else close
+    mask[filled] = True
+    return filled
+
+
+def align(frames: dict, interval, start=None, end=None, fill="mask", max_missing=None):
+    """
+    Preprocess {symbol: DataFrame} of candles (the CandleList.to_df
+    layout) into one Panel on the interval's bar grid, in place of
+    dropping every coin whose shape or first / last tic differs from the
+    majority.
+
+    fill         "mask": bars without data stay NaN, mask False
+                 "ffill": gaps inside a symbol's history become flat bars
+                 at the previous close (see fill_forward)
+    max_missing  drop the symbols missing more than this fraction of the
+                 grid bars (listed later, delisted or with gaps), None to
+                 keep every symbol
+
+    Returns (panel, report), the report (see quality_report) having the
+    dropped symbols flagged and the number of filled bars.
+    """
+    if fill not in FILL_POLICIES:
+        raise ValueError(f"Invalid fill policy: {fill}, expected one of {FILL_POLICIES}")
+    data = frame_bars(frames)
+    times = bar_grid(data, interval, start, end)
+    values = np.full((len(data), len(times), len(PANEL_FIELDS)), np.nan)
+    mask = np.zeros(values.shape[:2], dtype=bool)
+    stats = align_bars(data, times, interval_ms(interval), values, mask)
+    report = quality_report(list(data), times, mask, stats)
+
+    keep = np.ones(len(data), dtype=bool)
+    if max_missing is not None:
+        keep = (1 - report["coverage"].to_numpy()) <= max_missing
+        values, mask = values[keep], mask[keep]
+    report["dropped"] = ~keep
+
+    report["filled"] = 0
+    if fill == "ffill":
+        report.loc[keep, "filled"] = fill_forward(values, mask).sum(axis=1)
+
+    symbols = [symbol for symbol, kept in zip(data, keep) if kept]
+    return Panel(values, mask, symbols, times, interval), report
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+AVERAGE_RANK = "average_rank"
+
+
+def rank_rows(values, ascending=True):
+    """
+    Rank every row of a 2d array like pandas' rank(axis=1): ties get the
+    average of their ranks and NaNs stay NaN. One argsort over all rows.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rows, cols = values.shape
+    if values.size == 0:
+        return np.full(values.shape, np.nan)
+    keys = values if ascending else -values
+    order = np.argsort(keys, axis=1, kind="stable")  # NaNs last
+    ordered = np.take_along_axis(keys, order, axis=1)
+
+    # number the runs of equal values across all rows, then average the
+    # 1-based positions within each run
+    new_run = np.ones(values.shape, dtype=bool)
+    new_run[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    run = np.cumsum(new_run.ravel()) - 1
+    position = np.tile(np.arange(1, cols + 1, dtype=np.float64), rows)
+    average = np.bincount(run, weights=position) / np.bincount(run)
+
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, average[run].reshape(values.shape), axis=1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+class CrossSectionalRanker:
+    """
+    Per-timestamp cross-sectional ranks of a set of metrics, the
+    groupby("start_time")[metric].rank() of the ranking notebooks kept
+    incrementally:
+
+        metrics  {column: ascending}, e.g.
+                 {"rolling_accumulated_pct_change": False,
+                  "rolling_variance_pct_change": True}
+
+    Each new timestamp is ranked once, O(symbols log symbols), and stored
+    in a growing (time, column, symbol) array, the columns being
+    rank_<metric> for every metric then average_rank, their mean (NaN
+    unless every metric is ranked). The order of the latest timestamp is
+    cached, so top / bottom N are a slice.
+    """
+
+    def __init__(self, metrics: dict, symbols=(), capacity=1024):
+        if not metrics:
+            raise ValueError("At least one metric is required")
+        self.metrics = dict(metrics)
+        self.columns = [f"rank_{metric}" for metric in self.metrics] + [AVERAGE_RANK]
+        self.symbols = []
+        self.symbol_ids = {}
+        self.times = []
+        self.length = 0
+        self._ranks = np.full((max(capacity, 1), len(self.columns), 0), np.nan)
+        self._latest = {}
+        self._register(symbols)
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return f"CrossSectionalRanker({list(self.metrics)}, {len(self.symbols)} symbols x {self.length} times)"
+
+    def _register(self, symbols):
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.symbol_ids]
+        if not new:
+            return
+        for symbol in new:
+            self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        # symbols joining later have no ranks before they joined
+        capacity, n_columns, _ = self._ranks.shape
+        grown = np.full((capacity, n_columns, len(self.symbols)), np.nan)
+        grown[:, :, : self._ranks.shape[2]] = self._ranks
+        self._ranks = grown
+
+    def _reserve(self, count):
+        capacity = self._ranks.shape[0]
+        if self.length + count <= capacity:
+            return
+        while capacity < self.length + count:
+            capacity *= 2
+        grown = np.full((capacity, *self._ranks.shape[1:]), np.nan)
+        grown[: self.length] = self._ranks[: self.length]
+        self._ranks = grown
+
+    ########## update ##########
+    def add(self, time, values: dict):
+        """
+        Rank one new timestamp. values: {metric: array aligned with
+        self.symbols} (NaN where a symbol has no value).
+        """
+        matrix = np.array([values[metric] for metric in self.metrics], dtype=np.float64)
+        if matrix.shape[1] != len(self.symbols):
+            raise ValueError(f"Expected {len(self.symbols)} values per metric, got {matrix.shape[1]}")
+        self._append([time], matrix[np.newaxis])
+
+    def add_frame(self, df: pd.DataFrame, time_column="start_time", symbol_column="symbol"):
+        """
+        Rank the timestamps of a long frame (one row per symbol and time)
+        that are after the last ranked one; earlier rows are ignored.
+        symbol_column may be a column or an index level. Returns the number
+        of timestamps added.
+        """
+        times = df[time_column]
+        if self.times:
+            df = df[(times > self.times[-1]).to_numpy()]
+        if df.empty:
+            return 0
+        if symbol_column in df.columns:
+            symbols = df[symbol_column].to_numpy()
+        else:
+            symbols = df.index.get_level_values(symbol_column).to_numpy()
+        self._register(pd.unique(symbols))
+
+        wide = pd.DataFrame(
+            df[list(self.metrics)].to_numpy(dtype=np.float64),
+            index=pd.MultiIndex.from_arrays([df[time_column].to_numpy(), symbols]),
+            columns=list(self.metrics),
+        ).unstack()
+        wide = wide.reindex(
+            columns=pd.MultiIndex.from_product([list(self.metrics), self.symbols])
+        ).sort_index()
+        matrix = wide.to_numpy().reshape(len(wide), len(self.metrics), len(self.symbols))
+        self._append(list(wide.index), matrix)
+        return len(wide)
+
+    def _append(self, times, matrix):
+        """matrix: (time, metric, symbol) values of new timestamps, in order."""
+        if self.times and not times[0] > self.times[-1]:
+            raise ValueError(f"Timestamp {times[0]} is not after the last ranked one {self.times[-1]}")
+        count, n_metrics, n_symbols = matrix.shape
+        ranks = np.empty((count, n_metrics + 1, n_symbols))
+        for j, ascending in enumerate(self.metrics.values()):
+            ranks[:, j] = rank_rows(matrix[:, j], ascending=ascending)
+        ranks[:, -1] = ranks[:, :-1].mean(axis=1)
+
+        self._reserve(count)
+        self._ranks[self.length : self.length + count] = ranks
+        self.length += count
+        self.times.extend(times)
+        self._latest = {}
+
+    ########## query ##########
+    def ranks(self, column=AVERAGE_RANK):
+        """(time, symbol) DataFrame of one rank column."""
+        return pd.DataFrame(
+            self._ranks[: self.length, self.columns.index(column)],
+            index=self.times,
+            columns=self.symbols,
+        )
+
+    def latest(self, column=AVERAGE_RANK):
+        """Ranks of the latest timestamp by symbol, best first, unranked symbols dropped."""
+        if column not in self._latest:
+            if not self.length:
+                return pd.Series(dtype=np.float64)
+            row = self._ranks[self.length - 1, self.columns.index(column)]
+            order = np.argsort(row, kind="stable")[: np.count_nonzero(~np.isnan(row))]
+            self._latest[column] = pd.Series(row[order], index=np.asarray(self.symbols, dtype=object)[order])
+        return self._latest[column]
+
+    def top(self, n, column=AVERAGE_RANK):
+        """The n best ranked symbols of the latest timestamp, best first."""
+        return self.latest(column).index[:n].tolist()
+
+    def bottom(self, n, column=AVERAGE_RANK):
+        """The n worst ranked symbols of the latest timestamp, worst first."""
+        return self.latest(column).index[::-1][:n].tolist()
+
+    def to_frame(self, time_column="start_time"):
+        """Long format ranks: time, symbol and the rank columns, rows without any rank dropped."""
+        ranks = self._ranks[: self.length]
+        time_index, symbol_index = np.nonzero(~np.isnan(ranks).all(axis=1))
+        df = pd.DataFrame(ranks[time_index, :, symbol_index], columns=self.columns)
+        df.insert(0, time_column, np.asarray(self.times, dtype=object)[time_index])
+        df.insert(1, "symbol", np.asarray(self.symbols, dtype=object)[symbol_index])
+        return df
@@ -0,0 +1,194 @@
+import numpy as np
+
+from constants.intervals import bar_open, interval_ms
+from models.store import CANDLE_DTYPES, CandleStore
+
+
+def _check_intervals(source, target):
+    source_step, target_step = interval_ms(source), interval_ms(target)
+    if target_step <= source_step or target_step % source_step:
+        raise ValueError(f"Cannot resample {source} candles into {target}")
+    return target_step
+
+
+def _empty():
+    return {col: np.empty(0, dtype=dtype) for col, dtype in CANDLE_DTYPES.items()}
+
+
+def resample(columns, source, target):
+    """
+    Aggregate source candles ({column: array} sorted by t, as read from the
+    store) into target candles: first open, highest high, lowest low, last
+    close, summed volume and trade count n.
+    The last target bar is partial when the source candles stop before
+    its end, see Resampler for keeping it open.
+    """
+    step = _check_intervals(source, target)
+    t = np.asarray(columns["t"], dtype=np.int64)
+    if not len(t):
+        return _empty()
+    bucket = bar_open(t, target)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+
+    opened = bucket[starts]
+    return {
+        "t": opened,
+        "T": opened + step - 1,
+        "o": np.asarray(columns["o"], dtype=np.float64)[starts],
+        "h": np.maximum.reduceat(np.asarray(columns["h"], dtype=np.float64), starts),
+        "l": np.minimum.reduceat(np.asarray(columns["l"], dtype=np.float64), starts),
+        "c": np.asarray(columns["c"], dtype=np.float64)[ends],
+        "v": np.add.reduceat(np.asarray(columns["v"], dtype=np.float64), starts),
+        "n": np.add.reduceat(np.asarray(columns["n"], dtype=np.int64), starts),
+    }
+
+
+def _combine(first, second):
+    """Merge two candles ({column: scalar}) of the same target bar, first being earlier."""
+    return {
+        "t": first["t"],
+        "T": first["T"],
+        "o": first["o"],
+        "h": max(first["h"], second["h"]),
+        "l": min(first["l"], second["l"]),
+        "c": second["c"],
+        "v": first["v"] + second["v"],
+        "n": first["n"] + second["n"],
+    }
+
+
+def _row(columns, i):
+    return {col: columns[col][i].item() for col in CANDLE_DTYPES}
+
+
+class Resampler:
+    """
+    Keeps coarser candles of one symbol up to date from its fine ones, e.g.
+    Resampler("1m", ("15m", "1h", "4h")), without re-reading history.
+
+    Per target only the open bar is kept, aggregated from the source
+    candles before the latest one; the latest source candle is kept apart
+    as the API revises it until it closes: pushing a candle with the same t
+    again replaces it. A target bar is finished, and returned by update,
+    once a source candle of a later bar arrives.
+    """
+
+    def __init__(self, source, targets):
+        self.source = source
+        self.targets = tuple(targets)
+        self.steps = {target: _check_intervals(source, target) for target in self.targets}
+        self.last = None
+        self._open = dict.fromkeys(self.targets)
+
+    def update(self, columns):
+        """
+        Push new source candles ({column: array} sorted by t, or one candle
+        as {column: scalar}). Returns {target: finished candles} as
+        {column: array}, ready for CandleStore.append.
+        """
+        columns = {
+            col: np.atleast_1d(np.asarray(columns[col], dtype=dtype)) for col, dtype in CANDLE_DTYPES.items()
+        }
+        t = columns["t"]
+        if not len(t):
+            return {target: _empty() for target in self.targets}
+        if self.last is not None:
+            if t[0] < self.last["t"]:
+                raise ValueError(f"Candle at {t[0]} is before the last one at {self.last['t']}")
+            if t[0] == self.last["t"]:
+                # a revision of the latest candle
+                self.last = None
+
+        # the candles now known to be closed: the previous latest one and
+        # all new ones but the last
+        closed = {col: values[:-1] for col, values in columns.items()}
+        if self.last is not None:
+            closed = {
+                col: np.r_[np.asarray(self.last[col], dtype=values.dtype), values] for col, values in closed.items()
+            }
+        self.last = _row(columns, -1)
+
+        if len(closed["t"]) <= 1:
+            return {target: self._fold(target, closed) for target in self.targets}
+
+        finished = {}
+        for target in self.targets:
+            bars = resample(closed, self.source, target)
+            open_bar = self._open[target]
+            if open_bar is not None:
+                if len(bars["t"]) and bars["t"][0] == open_bar["t"]:
+                    first = _combine(open_bar, _row(bars, 0))
+                    for col in CANDLE_DTYPES:
+                        bars[col][0] = first[col]
+                else:
+                    bars = {
+                        col: np.r_[np.asarray(open_bar[col], dtype=values.dtype), values] for col, values in bars.items()
+                    }
+            # the bar of the latest candle stays open
+            if len(bars["t"]) and bars["t"][-1] == bar_open(self.last["t"], target):
+                self._open[target] = _row(bars, -1)
+                bars = {col: values[:-1] for col, values in bars.items()}
+            else:
+                self._open[target] = None
+            finished[target] = bars
+        return finished
+
+    def _fold(self, target, closed):
+        """update for at most one closed candle, on scalars."""
+        open_bar = self._open[target]
+        finished = []
+        if len(closed["t"]):
+            bar = _row(closed, 0)
+            bar["t"] = bar_open(bar["t"], target)
+            bar["T"] = bar["t"] + self.steps[target] - 1
+            if open_bar is not None and open_bar["t"] == bar["t"]:
+                open_bar = _combine(open_bar, bar)
+            else:
+                if open_bar is not None:
+                    finished.append(open_bar)
+                open_bar = bar
+        if open_bar is not None and open_bar["t"] != bar_open(self.last["t"], target):
+            finished.append(open_bar)
+            open_bar = None
+        self._open[target] = open_bar
+        return {col: np.array([bar[col] for bar in finished], dtype=dtype) for col, dtype in CANDLE_DTYPES.items()}
+
+    def current(self, target):
+        """The open target bar including the latest source candle, or None."""
+        if self.last is None:
+            return None
+        step = self.steps[target]
+        latest = dict(self.last, t=bar_open(self.last["t"], target))
+        latest["T"] = latest["t"] + step - 1
+        if self._open[target] is None:
+            return latest
+        return _combine(self._open[target], latest)
+
+
+def resample_store(store: CandleStore, symbol, source, target, start=None, end=None):
+    """
+    Derive the target candles of the store from its source candles with
+    start <= t < end, instead of fetching them. Only target bars lying
+    wholly inside the fetched source coverage (or, without any, the stored
+    range) are written, and their span is added to the target coverage.
+    Returns the number of target bars written.
+    """
+    step = _check_intervals(source, target)
+    columns = store.read(symbol, source, start, end)
+    if not len(columns["t"]):
+        return 0
+    lo = int(columns["t"][0]) if start is None else start
+    hi = int(columns["t"][-1]) + interval_ms(source) if end is None else end
+    spans = store.coverage(symbol, source) or [[int(columns["t"][0]), int(columns["t"][-1]) + interval_ms(source)]]
+
+    bars = resample(columns, source, target)
+    keep = np.zeros(len(bars["t"]), dtype=bool)
+    for span_start, span_end in spans:
+        # the whole target bars within the span and the range read
+        first = bar_open(max(span_start, lo) + step - 1, target)
+        last = bar_open(min(span_end, hi), target)
+        if first < last:
+            keep |= (bars["t"] >= first) & (bars["t"] < last)
+            store.add_coverage(symbol, target, first, last)
+    return store.append(symbol, target, {col: values[keep] for col, values in bars.items()})
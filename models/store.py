@@ -0,0 +1,215 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from settings import CANDLE_DIR
+
+# candle columns on disk, named as in the candles_snapshot response
+CANDLE_DTYPES = {
+    "t": np.int64,  # open time, ms
+    "T": np.int64,  # close time, ms
+    "o": np.float64,
+    "h": np.float64,
+    "l": np.float64,
+    "c": np.float64,
+    "v": np.float64,
+    "n": np.int64,  # number of trades
+}
+
+# the DataFrame names of the columns, as in CandleList.to_df
+CANDLE_DF_COLUMNS = {
+    "o": "open",
+    "h": "high",
+    "l": "low",
+    "c": "close",
+    "v": "volume",
+    "n": "number_of_trades",
+    "t": "tic",
+    "T": "toc",
+}
+
+PARTITIONS = {"month": "datetime64[M]", "day": "datetime64[D]"}
+
+
+def merge_spans(spans):
+    """Sort [start, end) spans and merge the ones overlapping or touching."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_spans(start, end, spans):
+    """The parts of [start, end) outside the merged spans."""
+    missing = []
+    for span_start, span_end in spans:
+        if span_end <= start:
+            continue
+        if span_start >= end:
+            break
+        if span_start > start:
+            missing.append([start, span_start])
+        start = max(start, span_end)
+    if start < end:
+        missing.append([start, end])
+    return missing
+
+
+class CandleStore:
+    """
+    Candles on disk as one .npy file per column, partitioned by
+    symbol / interval / month (or day), rows sorted by open time `t`:
+
+        root/BTC/15m/2024-01/t.npy, T.npy, o.npy, ...
+
+    Appends merge into the partitions, replacing rows with the same `t`.
+    Range reads memory-map the columns and copy only the requested rows.
+    coverage.json records the [start, end) spans of `t` already fetched,
+    including the ones the exchange had no candles for.
+    """
+
+    def __init__(self, root=CANDLE_DIR, partition="month"):
+        if partition not in PARTITIONS:
+            raise ValueError(f"Invalid partition: {partition}, expected one of {list(PARTITIONS)}")
+        self.root = Path(root)
+        self.partition = partition
+
+    ########## paths ##########
+    def _dir(self, symbol, interval):
+        return self.root / symbol / interval
+
+    def _partition_keys(self, t):
+        """Partition name of each open time, e.g. 2024-01."""
+        return np.asarray(t, dtype="datetime64[ms]").astype(PARTITIONS[self.partition]).astype(str)
+
+    def partitions(self, symbol, interval):
+        """The partition names of a symbol and interval, in time order."""
+        path = self._dir(symbol, interval)
+        if not path.exists():
+            return []
+        return sorted(p.name for p in path.iterdir() if (p / "t.npy").exists())
+
+    ########## write ##########
+    def append(self, symbol, interval, columns):
+        """
+        Merge candles into the store.
+        columns: {name: array} with every column of CANDLE_DTYPES
+        Returns the number of rows written.
+        """
+        missing = set(CANDLE_DTYPES) - set(columns)
+        if missing:
+            raise ValueError(f"Missing candle columns: {sorted(missing)}")
+        columns = {col: np.asarray(columns[col], dtype=dtype) for col, dtype in CANDLE_DTYPES.items()}
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("Candle columns must have the same length")
+        if not lengths.pop():
+            return 0
+
+        keys = self._partition_keys(columns["t"])
+        for key in np.unique(keys):
+            rows = keys == key
+            self._merge(self._dir(symbol, interval) / key, {col: values[rows] for col, values in columns.items()})
+        return len(keys)
+
+    def _merge(self, path, columns):
+        if (path / "t.npy").exists():
+            existing = self._load(path)
+            columns = {col: np.concatenate([existing[col], columns[col]]) for col in CANDLE_DTYPES}
+        # keep the last row of each t, so new candles replace stored ones
+        t = columns["t"][::-1]
+        _, last = np.unique(t, return_index=True)
+        order = len(t) - 1 - last
+        path.mkdir(parents=True, exist_ok=True)
+        for col, values in columns.items():
+            tmp = path / f"{col}.tmp.npy"
+            np.save(tmp, values[order])
+            os.replace(tmp, path / f"{col}.npy")
+
+    @staticmethod
+    def _load(path, columns=CANDLE_DTYPES, mmap_mode=None):
+        return {col: np.load(path / f"{col}.npy", mmap_mode=mmap_mode) for col in columns}
+
+    ########## read ##########
+    def read(self, symbol, interval, start=None, end=None, columns=None):
+        """
+        Candles with start <= t < end (ms, None for unbounded) as
+        {column: array}, sorted by t.
+        """
+        columns = list(columns or CANDLE_DTYPES)
+        keys = self.partitions(symbol, interval)
+        if start is not None:
+            first = str(self._partition_keys(start))
+            keys = [key for key in keys if key >= first]
+        if end is not None:
+            last = str(self._partition_keys(end - 1))
+            keys = [key for key in keys if key <= last]
+
+        parts = {col: [] for col in columns}
+        for key in keys:
+            path = self._dir(symbol, interval) / key
+            t = np.load(path / "t.npy", mmap_mode="r")
+            lo = 0 if start is None else np.searchsorted(t, start, side="left")
+            hi = len(t) if end is None else np.searchsorted(t, end, side="left")
+            if lo >= hi:
+                continue
+            for col, values in self._load(path, columns, mmap_mode="r").items():
+                parts[col].append(np.array(values[lo:hi]))
+        return {
+            col: np.concatenate(parts[col]) if parts[col] else np.empty(0, dtype=CANDLE_DTYPES[col])
+            for col in columns
+        }
+
+    def read_df(self, symbol, interval, start=None, end=None):
+        """
+        Candles with start <= t < end as a DataFrame with the backtesting
+        columns: datetime (open time), open, high, low, close, volume,
+        number_of_trades, tic, toc, symbol and interval.
+        """
+        columns = self.read(symbol, interval, start, end)
+        n = len(columns["t"])
+        df = pd.DataFrame({"datetime": columns["t"].astype("datetime64[ms]").astype("datetime64[ns]")})
+        for col, name in CANDLE_DF_COLUMNS.items():
+            df[name] = columns[col]
+        df["symbol"] = np.full(n, symbol, dtype=object)
+        df["interval"] = np.full(n, interval, dtype=object)
+        return df
+
+    def span(self, symbol, interval):
+        """(first t, last t) stored for a symbol and interval, or None."""
+        keys = self.partitions(symbol, interval)
+        if not keys:
+            return None
+        path = self._dir(symbol, interval)
+        first = np.load(path / keys[0] / "t.npy", mmap_mode="r")
+        last = np.load(path / keys[-1] / "t.npy", mmap_mode="r")
+        return int(first[0]), int(last[-1])
+
+    ########## coverage ##########
+    def coverage(self, symbol, interval):
+        """The merged [start, end) spans already fetched, in ms."""
+        path = self._dir(symbol, interval) / "coverage.json"
+        if not path.exists():
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def add_coverage(self, symbol, interval, start, end):
+        spans = merge_spans(self.coverage(symbol, interval) + [[int(start), int(end)]])
+        path = self._dir(symbol, interval)
+        path.mkdir(parents=True, exist_ok=True)
+        tmp = path / "coverage.tmp.json"
+        with open(tmp, "w") as f:
+            json.dump(spans, f)
+        os.replace(tmp, path / "coverage.json")
+        return spans
+
+    def missing(self, symbol, interval, start, end):
+        """The [start, end) spans of the range not fetched yet."""
+        return missing_spans(start, end, self.coverage(symbol, interval))
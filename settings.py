@@ -5,4 +5,5 @@ from pathlib import Path
 # This assumes the config file is in the top-level directory of your project
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / 'data'
+CANDLE_DIR = DATA_DIR / 'candles'
 CONTANT_DIR = BASE_DIR / 'constants'
@@ -0,0 +1,80 @@
+"""Synthetic candles and snapshots shared by the tests."""
+
+import numpy as np
+import pandas as pd
+
+from models.backtesting.backtesting import EXPECTED_DTYPES
+
+MINUTE = 60_000
+BAR = 15 * MINUTE
+# 2024-01-31 12:00 UTC
+START = 1706702400000
+
+
+def make_response(start, n, interval_ms=BAR, symbol="BTC", seed=0):
+    """A candleSnapshot response of n candles opening every interval_ms from start."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return [
+        {
+            "t": start + i * interval_ms,
+            "T": start + (i + 1) * interval_ms - 1,
+            "s": symbol,
+            "i": "15m",
+            "o": str(close[i] * 1.001),
+            "c": str(close[i]),
+            "h": str(close[i] * 1.002),
+            "l": str(close[i] * 0.998),
+            "v": str(rng.uniform(0, 10)),
+            "n": int(rng.integers(0, 100)),
+        }
+        for i in range(n)
+    ]
+
+
+def make_candles(n=120, seed=1, symbols=("BTC",)):
+    """
+    A backtest frame of n 15m bars per symbol, in time order and the
+    symbols' order within a bar; the i-th symbol is drawn from seed + i.
+    """
+    frames = []
+    for i, symbol in enumerate(symbols):
+        rng = np.random.default_rng(seed + i)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        open_ = np.r_[close[0], close[:-1]]
+        frames.append(
+            pd.DataFrame(
+                {
+                    "open": open_,
+                    "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n)),
+                    "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n)),
+                    "close": close,
+                    "volume": rng.uniform(1, 10, n),
+                    "symbol": symbol,
+                    "datetime": pd.date_range("2024-01-01", periods=n, freq="15min"),
+                    "interval": "15m",
+                }
+            )
+        )
+    df = pd.concat(frames).sort_values("datetime", kind="stable", ignore_index=True)
+    return df.astype(EXPECTED_DTYPES)
+
+
+def make_snapshot(names, price):
+    """A metaAndAssetCtxs response, every coin at price; ILLIQ has no mid price."""
+    universe = [{"name": n, "maxLeverage": 20, "onlyIsolated": False, "szDecimals": 2} for n in names]
+    ctxs = [
+        {
+            "dayNtlVlm": "1000.0",
+            "funding": "0.0000125",
+            "impactPxs": [str(price * 0.999), str(price * 1.001)],
+            "markPx": str(price),
+            "midPx": None if n == "ILLIQ" else str(price),
+            "openInterest": "55.5",
+            "oraclePx": str(price),
+            "premium": "0.0001",
+            "prevDayPx": str(price * 0.9),
+        }
+        for n in names
+    ]
+    return [{"universe": universe}, ctxs]
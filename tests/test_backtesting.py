@@ -0,0 +1,168 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from helpers import make_candles
+from models.backtesting.backtesting import BackTesting
+from models.backtesting.strategy import Strategy
+from models.backtesting.BollingerBandsReEntryStrategy import (
+    BollingerBandsReEntryStrategy,
+)
+from models.backtesting.sweep import run_parameter_sweep
+from models.backtesting.walkforward import run_walk_forward, walk_forward_folds
+
+
+class RecordingStrategy(Strategy):
+    """Legacy strategy that only implements run()"""
+
+    def __init__(self):
+        self.seen = []
+
+    def run(self, current_data, historical_data):
+        self.seen.append(
+            (current_data["close"], current_data["datetime"], len(historical_data))
+        )
+
+    def end(self):
+        pass
+
+
+class WindowStrategy(Strategy):
+    """Native array strategy reading the cursor directly"""
+
+    def __init__(self):
+        self.means = []
+
+    def run_bar(self, cursor):
+        window = cursor.window("close", 20)
+        self.means.append(window.mean())
+        assert np.shares_memory(window, cursor.bars["close"])
+
+    def end(self):
+        pass
+
+
+class TestArrayEngine(unittest.TestCase):
+    def setUp(self):
+        self.data = make_candles()
+        self.backtesting = BackTesting(verbose=False)
+
+    def test_adapter_matches_iterrows(self):
+        legacy = RecordingStrategy()
+        self.backtesting.run_backtesting(self.data, strategy=legacy)
+        adapted = RecordingStrategy()
+        self.backtesting.run_backtesting(self.data, strategy=adapted, mode="array")
+        self.assertEqual(legacy.seen, adapted.seen)
+
+    def test_window_views(self):
+        strategy = WindowStrategy()
+        self.backtesting.run_backtesting(self.data, strategy=strategy, mode="array")
+        expected = self.data["close"].rolling(20, min_periods=1).mean().to_numpy()
+        np.testing.assert_allclose(strategy.means, expected)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            self.backtesting.run_backtesting(
+                self.data, strategy=RecordingStrategy(), mode="unknown"
+            )
+
+
+class TestVectorizedBollingerBandsReEntry(unittest.TestCase):
+    def run_strategy(self, data, mode):
+        strategy = BollingerBandsReEntryStrategy(
+            initial_capital=200,
+            buy_equity=10,
+            leverage=20,
+            k=2,
+            stop_loss_percentage=0.8,
+        )
+        strategy.VERBOSE = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            BackTesting(verbose=False).run_backtesting(
+                data, strategy=strategy, mode=mode
+            )
+        return strategy
+
+    def test_matches_iterrows(self):
+        data = make_candles(n=200, seed=7)
+        legacy = self.run_strategy(data, "iterrows")
+        vectorized = self.run_strategy(data, "vectorized")
+
+        self.assertGreater(legacy.history.shape[0], 0)
+        pd.testing.assert_frame_equal(legacy.history, vectorized.history)
+        pd.testing.assert_frame_equal(
+            legacy.portfolio.portfolio_history,
+            vectorized.portfolio.portfolio_history,
+        )
+
+
+class TestParameterSweep(unittest.TestCase):
+    def test_pool_matches_serial(self):
+        data = make_candles(n=300, seed=3)
+        grid = {"k": [1.5, 2], "leverage": [5, 20], "stop_loss_percentage": [0.8]}
+        serial = run_parameter_sweep(data, grid, processes=1)
+        pooled = run_parameter_sweep(data, grid, processes=2)
+
+        self.assertEqual(len(serial), 4)
+        self.assertEqual(
+            list(serial.columns),
+            [
+                "k",
+                "leverage",
+                "stop_loss_percentage",
+                "final_equity",
+                "return_percentage",
+                "max_drawdown",
+                "max_drawdown_percentage",
+                "trade_count",
+            ],
+        )
+        pd.testing.assert_frame_equal(serial, pooled)
+
+
+class TestWalkForward(unittest.TestCase):
+    def test_folds(self):
+        rolling = walk_forward_folds(100, 40, 20, warmup=10)
+        self.assertEqual(
+            [(f["train_start"], f["warmup_start"], f["test_start"], f["test_end"]) for f in rolling],
+            [(0, 30, 40, 60), (20, 50, 60, 80), (40, 70, 80, 100)],
+        )
+        anchored = walk_forward_folds(100, 40, 20, anchored=True)
+        self.assertEqual([f["train_start"] for f in anchored], [0, 0, 0])
+        with self.assertRaises(ValueError):
+            walk_forward_folds(100, 40, 20, step=10)
+
+    def test_pool_matches_serial_and_stitches(self):
+        data = make_candles(n=400, seed=5)
+        kwargs = dict(
+            params={"leverage": 10, "stop_loss_percentage": 0.8},
+            param_grid={"k": [1.5, 2]},
+        )
+        curve, folds = run_walk_forward(data, 150, 80, processes=1, **kwargs)
+        pooled_curve, pooled_folds = run_walk_forward(data, 150, 80, processes=2, **kwargs)
+        pd.testing.assert_frame_equal(curve, pooled_curve)
+        pd.testing.assert_frame_equal(folds, pooled_folds)
+
+        self.assertEqual(len(folds), 3)
+        self.assertEqual(len(curve), 3 * 80)
+        self.assertEqual(list(curve["datetime"]), list(data["datetime"].iloc[150:390]))
+        # rescaling keeps each fold's return
+        closes = curve.groupby("fold")["close"]
+        np.testing.assert_allclose(
+            closes.last() / closes.first(), 1 + folds["return_percentage"] / 100
+        )
+
+    def test_integer_grid(self):
+        data = make_candles(n=400, seed=5)
+        curve, folds = run_walk_forward(
+            data, 150, 80, params={"stop_loss_percentage": 0.8}, param_grid={"leverage": [5, 10]}, processes=1
+        )
+        self.assertEqual(len(folds), 3)
+        self.assertTrue(folds["leverage"].isin([5, 10]).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
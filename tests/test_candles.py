@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from helpers import START, make_response
+from models.candles import Candle, CandleList
+
+
+class TestCandleListColumns(unittest.TestCase):
+    def setUp(self):
+        self.response = make_response(START, 50)
+        self.candles = CandleList.from_response(self.response)
+
+    def test_columns_match_candle_objects(self):
+        objects = [Candle(**candle) for candle in self.response]
+        columns = self.candles.columns
+        np.testing.assert_array_equal(columns["c"], [float(c.c) for c in objects])
+        np.testing.assert_array_equal(columns["t"], [c.t for c in objects])
+        self.assertEqual(columns["n"].dtype, np.int64)
+
+        self.assertIsNone(self.candles._candles)
+        self.assertEqual(self.candles.candles[7].to_dict(), objects[7].to_dict())
+
+    def test_to_df_matches_per_candle_series(self):
+        expected = pd.DataFrame(
+            [Candle(**candle).to_series() for candle in self.response]
+        ).astype({"close": float, "tic": np.int64})
+        df = self.candles.to_df()
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+        self.assertEqual(self.candles.start_time, expected["start_time"].iloc[0])
+        self.assertEqual(self.candles.end_time, expected["end_time"].iloc[-1])
+
+    def test_from_df_round_trip(self):
+        df = self.candles.to_df()
+        pd.testing.assert_frame_equal(CandleList.from_df(df).to_df(), df)
+
+
+class TestCandleSerialization(unittest.TestCase):
+    def test_msgpack_round_trip(self):
+        candle = Candle(**make_response(START, 1)[0])
+        decoded = Candle.from_msgpack(candle.to_msgpack())
+        self.assertEqual(decoded.to_dict(), candle.to_dict())
+        self.assertEqual(decoded.start_time, "2024-01-31-12:00:00")
+        self.assertEqual(decoded.end_time, "2024-01-31-12:14:59")
+        self.assertFalse(hasattr(decoded, "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
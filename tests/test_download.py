@@ -0,0 +1,127 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from helpers import BAR, START, make_response
+from models.store import CandleStore
+from utils.download import TokenBucket, download_candles, page_spans
+
+
+class FakeInfoHandler(BaseHTTPRequestHandler):
+    """POST /info candleSnapshot over fixed histories, failing every 5th request."""
+
+    histories = {}
+    limit = 5000
+    requests = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        req = body["req"]
+        with self.lock:
+            self.requests.append(req)
+            fail = len(self.requests) % 5 == 0
+        if self.path != "/info" or body["type"] != "candleSnapshot":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if fail:
+            self.send_response(429)
+            self.end_headers()
+            return
+        rows = [
+            c
+            for c in self.histories[req["coin"]]
+            if req["startTime"] <= c["t"] <= req["endTime"]
+        ][: self.limit]
+        data = json.dumps(rows).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCandleDownloader(unittest.TestCase):
+    def setUp(self):
+        self.symbols = ["BTC", "ETH", "SOL"]
+        FakeInfoHandler.histories = {
+            symbol: make_response(START, 1000, symbol=symbol, seed=i)
+            for i, symbol in enumerate(self.symbols)
+        }
+        FakeInfoHandler.limit = 300
+        FakeInfoHandler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeInfoHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.tmp.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def download(self, first, last):
+        return download_candles(
+            self.symbols,
+            "15m",
+            START + first * BAR,
+            START + last * BAR,
+            base_url=self.url,
+            store=self.store,
+            rate=1000,
+            burst=1000,
+            backoff=0.01,
+            max_bars=300,
+        )
+
+    def test_downloads_pages_into_store(self):
+        self.assertEqual(self.download(0, 900), {symbol: 900 for symbol in self.symbols})
+        # 3 pages per symbol, plus the retried 429s
+        self.assertGreater(len(FakeInfoHandler.requests), 9)
+        for symbol in self.symbols:
+            columns = self.store.read(symbol, "15m")
+            expected = FakeInfoHandler.histories[symbol][:900]
+            np.testing.assert_array_equal(columns["t"], [c["t"] for c in expected])
+            np.testing.assert_array_equal(columns["c"], [float(c["c"]) for c in expected])
+
+        FakeInfoHandler.requests.clear()
+        self.assertEqual(self.download(500, 1000), {symbol: 100 for symbol in self.symbols})
+        self.assertTrue(all(r["startTime"] == START + 900 * BAR for r in FakeInfoHandler.requests))
+
+    def test_follows_up_short_pages(self):
+        # the API returns fewer bars than a page holds
+        FakeInfoHandler.limit = 120
+        self.assertEqual(self.download(0, 900), {symbol: 900 for symbol in self.symbols})
+        for symbol in self.symbols:
+            self.assertEqual(len(self.store.read(symbol, "15m")["t"]), 900)
+            self.assertEqual(self.store.missing(symbol, "15m", START, START + 900 * BAR), [])
+
+    def test_page_spans(self):
+        self.assertEqual(
+            page_spans(0, 7 * BAR, "15m", max_bars=3),
+            [[0, 3 * BAR], [3 * BAR, 6 * BAR], [6 * BAR, 7 * BAR]],
+        )
+
+    def test_token_bucket_limits_rate(self):
+        async def acquire_all():
+            bucket = TokenBucket(rate=100, capacity=1)
+            start = time.monotonic()
+            await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(acquire_all()), 0.09)
+
+
+if __name__ == "__main__":
+    unittest.main()
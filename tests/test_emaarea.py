@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from models.emaarea import EmaArea
+
+N_BARS = 260
+
+
+def make_frame(n_symbols=8, seed=0):
+    """Long frame of closes, every third symbol listed late."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_symbols):
+        start = int(rng.integers(1, 40)) if i % 3 == 0 else 0
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, N_BARS - start)))
+        frames.append(pd.DataFrame({"symbol": f"C{i}", "bar": np.arange(start, N_BARS), "close": close}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def notebook_area(df, span=20, window=30):
+    """calculate_normalized_area_under_ema200 of the ranking notebook."""
+    df = df.copy()
+    df["ema"] = df.groupby("symbol")["close"].transform(lambda x: x.ewm(span=span, adjust=False).mean())
+    df["area"] = df["close"] - df["ema"]
+    df["norm_area"] = df["area"] / df.groupby("symbol")["ema"].transform("mean")
+    df["sum_norm_area"] = df.groupby("symbol")["norm_area"].transform(lambda x: x.rolling(window=window).sum())
+    return df
+
+
+class TestEmaArea(unittest.TestCase):
+    def setUp(self):
+        self.df = make_frame()
+        self.symbols = list(self.df["symbol"].unique())
+        self.expected = notebook_area(self.df)
+        self.close = self.df.pivot(index="symbol", columns="bar", values="close").reindex(self.symbols).to_numpy()
+
+    def test_fit_frame_matches_notebook(self):
+        df = EmaArea(self.symbols, span=20, window=30).fit_frame(self.df)
+        np.testing.assert_allclose(df["ema20"], self.expected["ema"], rtol=1e-9)
+        for column in ("area", "norm_area", "sum_norm_area"):
+            np.testing.assert_allclose(df[column], self.expected[column], rtol=1e-9, atol=1e-12)
+
+    def test_fit_panel(self):
+        result = EmaArea(self.symbols, span=20, window=30).fit(self.close)
+        expected = self.expected.pivot(index="symbol", columns="bar", values="sum_norm_area").reindex(self.symbols)
+        np.testing.assert_allclose(result["sum_norm_area"], expected.to_numpy(), rtol=1e-9)
+
+    def test_update_matches_refit(self):
+        area = EmaArea(self.symbols, span=20, window=30)
+        area.fit(self.close[:, :100])
+        for bar in range(100, N_BARS):
+            latest = area.update(self.close[:, bar])
+        last = self.expected.groupby("symbol")["sum_norm_area"].last().reindex(self.symbols)
+        np.testing.assert_allclose(latest, last.to_numpy(), rtol=1e-9)
+
+        ranked = area.rank()
+        self.assertEqual(ranked["symbol"].tolist(), last.sort_values(ascending=False).index.tolist())
+        self.assertEqual(ranked["rank"].tolist(), list(range(1, len(self.symbols) + 1)))
+
+    def test_update_from_empty(self):
+        area = EmaArea(["A"], span=3, window=2)
+        for close in (1.0, 2.0, 3.0):
+            latest = area.update([close])
+        ema = pd.Series([1.0, 2.0, 3.0]).ewm(span=3, adjust=False).mean()
+        np.testing.assert_allclose(latest, [((2 - ema[1]) + (3 - ema[2])) / ema.mean()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from models.features import FEATURES, RollingFeatures
+from models.ranking import CrossSectionalRanker
+
+WINDOW = 30
+
+
+def notebook_features(close, window=WINDOW):
+    """prepare_data of the ranking notebook on one symbol's closes."""
+    df = pd.DataFrame({"close": close})
+    df["pct_change"] = df["close"].pct_change()
+    df["rolling_accumulated_pct_change"] = (
+        df["pct_change"].rolling(window=window, min_periods=1).apply(lambda y: np.prod(1 + y / 100)) - 1
+    ) * 100
+    df["rolling_variance_pct_change"] = df["pct_change"].rolling(window=window, min_periods=1).var()
+    return df
+
+
+class TestRollingFeatures(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.symbols = [f"C{i}" for i in range(6)]
+        self.close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (6, 120)), axis=1))
+        # listed later
+        self.close[::3, :25] = np.nan
+
+    def test_matches_notebook(self):
+        history = RollingFeatures(self.symbols, window=WINDOW).extend(self.close)
+        for i in range(len(self.symbols)):
+            listed = ~np.isnan(self.close[i])
+            expected = notebook_features(self.close[i, listed])
+            for j, feature in enumerate(FEATURES):
+                np.testing.assert_allclose(
+                    history[listed, j, i], expected[feature], rtol=1e-9, atol=1e-15, err_msg=feature
+                )
+
+    def test_missing_bar(self):
+        features = RollingFeatures(["A"], window=WINDOW)
+        features.extend([[100.0, 110.0, np.nan, 121.0]])
+        self.assertAlmostEqual(features["pct_change"][0], 0.1)
+        self.assertEqual(features.values.shape, (len(FEATURES), 1))
+        self.assertTrue(features.values.flags["C_CONTIGUOUS"])
+
+    def test_feeds_ranker(self):
+        features = RollingFeatures(self.symbols, window=WINDOW)
+        ranker = CrossSectionalRanker(
+            {"rolling_accumulated_pct_change": False, "rolling_variance_pct_change": True},
+            symbols=self.symbols,
+        )
+        for t in range(self.close.shape[1]):
+            features.update(self.close[:, t])
+            ranker.add(t, features.as_dict())
+        expected = pd.Series(features["rolling_accumulated_pct_change"], index=self.symbols).rank(ascending=False)
+        np.testing.assert_array_equal(
+            ranker.ranks("rank_rolling_accumulated_pct_change").iloc[-1].to_numpy(), expected.to_numpy()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
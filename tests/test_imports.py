@@ -0,0 +1,60 @@
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# only needed for charts, notebooks or the network, imported on first use
+LAZY_MODULES = ("IPython", "plotly", "httpx", "hyperliquid.info")
+
+MODULES = (
+    "models.base",
+    "models.backtesting",
+    "models.backtesting.BollingerBandsReEntryStrategy",
+    "models.backtesting.walkforward",
+    "utils.fetch_coin",
+)
+
+# pandas and numpy are imported first, their own import time (~0.3s on a
+# small machine) is the floor of any backtest worker and not measured.
+# The timings are printed by running this file, the tests only check that
+# nothing heavy is imported, wall-clock limits being flaky on busy machines
+BENCHMARK = """
+import json, sys, time
+import numpy, pandas
+start = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "ms": (time.perf_counter() - start) * 1000,
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def import_cold(module):
+    """Import module in a fresh interpreter, returns (ms beyond pandas, lazy modules loaded)."""
+    out = subprocess.run(
+        [sys.executable, "-c", BENCHMARK.format(module=module, lazy=LAZY_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(out.splitlines()[-1])
+    return result["ms"], result["loaded"]
+
+
+class TestImports(unittest.TestCase):
+    def test_imports_are_side_effect_free(self):
+        for module in MODULES:
+            with self.subTest(module=module):
+                _, loaded = import_cold(module)
+                self.assertEqual(loaded, [])
+
+
+if __name__ == "__main__":
+    for module in MODULES:
+        ms, loaded = import_cold(module)
+        print(f"{module:50s} {ms:7.1f} ms  {loaded or ''}")
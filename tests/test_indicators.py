@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from models.indicators import IndicatorCache, RollingWindow, StreamingBollingerBands
+
+
+class TestStreamingBollingerBands(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # large level, small moves: the case naive sum-of-squares gets wrong
+        self.close = 30000 + np.cumsum(rng.normal(0, 5, 3000))
+
+    def test_matches_pandas_rolling(self):
+        bands = StreamingBollingerBands(window=20, k=2)
+        result = np.array([bands.update(close) for close in self.close])
+
+        close = pd.Series(self.close)
+        middle = close.rolling(window=20).mean()
+        std = close.rolling(window=20).std()
+        np.testing.assert_allclose(result[:, 0], middle, rtol=1e-12)
+        np.testing.assert_allclose(result[:, 1], middle + std * 2, rtol=1e-12)
+        np.testing.assert_allclose(result[:, 2], middle - std * 2, rtol=1e-12)
+        self.assertTrue(np.isnan(result[:19]).all())
+
+    def test_skips_nan_like_pandas(self):
+        close = self.close.copy()
+        close[[50, 51, 400]] = np.nan
+        bands = StreamingBollingerBands(window=20, k=2)
+        result = np.array([bands.update(value) for value in close])
+
+        expected = pd.Series(close).rolling(window=20).mean()
+        np.testing.assert_allclose(result[:, 0], expected, rtol=1e-12)
+
+
+class TestRollingWindow(unittest.TestCase):
+    def test_many_streams_match_pandas(self):
+        rng = np.random.default_rng(1)
+        values = rng.normal(size=(500, 6))
+        values[rng.random(values.shape) < 0.05] = np.nan
+
+        rolling = RollingWindow(window=30, shape=6, min_periods=1)
+        means, variances = [], []
+        for row in values:
+            rolling.push(row)
+            means.append(rolling.mean)
+            variances.append(rolling.var())
+
+        frame = pd.DataFrame(values).rolling(window=30, min_periods=1)
+        np.testing.assert_allclose(means, frame.mean(), rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(variances, frame.var(), rtol=1e-9, atol=1e-12)
+
+
+class TestIndicatorCache(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.close = 100 + np.cumsum(rng.normal(0, 1, 500))
+        self.cache = IndicatorCache(maxsize=8)
+
+    def test_matches_pandas(self):
+        close = pd.Series(self.close)
+        middle, upper, lower, std = self.cache.compute("bollinger", self.close, window=20, k=2)
+        np.testing.assert_array_equal(middle, close.rolling(20).mean())
+        np.testing.assert_array_equal(upper, close.rolling(20).mean() + close.rolling(20).std() * 2)
+
+        ema12 = close.ewm(span=12, adjust=False).mean()
+        ema26 = close.ewm(span=26, adjust=False).mean()
+        line, signal, histogram = self.cache.compute("macd", self.close)
+        np.testing.assert_allclose(line, ema12 - ema26)
+        np.testing.assert_allclose(signal, (ema12 - ema26).ewm(span=9, adjust=False).mean())
+
+        rsi = self.cache.compute("rsi", self.close, period=14)
+        self.assertTrue(np.isnan(rsi[:14]).all())
+        self.assertTrue(((rsi[14:] >= 0) & (rsi[14:] <= 100)).all())
+
+    def test_hits_and_shared_results(self):
+        first = self.cache.compute("bollinger", self.close, symbol="BTC", interval="15m", version=1)
+        # the defaults are part of the key, and bollinger reuses sma / std
+        self.assertIs(self.cache.compute("sma", self.close, symbol="BTC", interval="15m", version=1, window=20), first[0])
+        self.assertIs(self.cache.compute("bollinger", self.close, symbol="BTC", interval="15m", version=1, k=2), first)
+        self.assertEqual(self.cache.info()[:2], (2, 3))
+        self.assertFalse(first[0].flags.writeable)
+
+        # a new version of the data misses
+        self.cache.compute("sma", self.close, symbol="BTC", interval="15m", version=2)
+        self.assertEqual(self.cache.info().misses, 4)
+
+        # without a version the content is the key
+        self.cache.compute("ema", self.close)
+        self.cache.compute("ema", self.close.copy())
+        self.assertEqual(self.cache.info()[:2], (3, 5))
+
+    def test_bounded(self):
+        for window in range(2, 20):
+            self.cache.compute("sma", self.close, version=0, window=window)
+        self.assertEqual(len(self.cache), 8)
+        self.cache.compute("sma", self.close, version=0, window=19)
+        self.cache.compute("sma", self.close, version=0, window=2)
+        self.assertEqual(self.cache.info()[:2], (1, 19))
+        with self.assertRaises(ValueError):
+            self.cache.compute("vwap", self.close)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,11 @@
+import time
 import unittest
 from decimal import Decimal
 
 # Assuming MarginPosition class is imported from the margin_position module
 from models.backtesting.marginPosition import MarginPosition, Decimal
+from models.backtesting.numeric import DECIMAL, FLOAT, FixedPointBackend
+from models.backtesting.portfolio import Portfolio
 
 class TestMarginPosition(unittest.TestCase):
     def setUp(self):
@@ -63,5 +66,97 @@ class TestMarginPosition(unittest.TestCase):
         expected_evaluation = Decimal("0")  # Calculated manually
         self.assertEqual(self.position_long.position_evaluation(self.current_price), expected_evaluation)
 
+class TestNumericBackends(unittest.TestCase):
+    """Reconcile the fast backends against the Decimal reference"""
+
+    cases = [
+        # entry, equity, leverage, current
+        (50000.5, 10, 20, 49712.25),
+        (0.012345, 250, 3, 0.013001),
+        (3.1415, 77, 1, 2.5),
+        (1999.9, 5, 50, 2011.3),
+    ]
+
+    def positions(self, side, backend, sz_decimals=None):
+        for entry, equity, leverage, current in self.cases:
+            reference = MarginPosition("X", entry, equity, side, leverage, 0.5)
+            other = MarginPosition("X", entry, equity, side, leverage, 0.5, backend=backend)
+            yield reference, other, current
+
+    def test_float_matches_decimal(self):
+        for side in MarginPosition.Side:
+            for reference, position, current in self.positions(side, FLOAT):
+                self.assertAlmostEqual(
+                    position.position_evaluation(current),
+                    float(reference.position_evaluation(current)),
+                    places=9,
+                )
+                self.assertEqual(
+                    position.should_stop_loss(current), reference.should_stop_loss(current)
+                )
+
+    def test_fixed_matches_decimal_on_lots(self):
+        # with sizes rounded down to whole lots and prices to ticks, the
+        # fixed-point result is exactly the Decimal one
+        backend = FixedPointBackend(sz_decimals=2)
+        tick = Decimal(1) / backend.price_scale
+        lot = Decimal(1) / backend.size_scale
+        for side in MarginPosition.Side:
+            for reference, position, current in self.positions(side, backend):
+                entry = reference.entry_price.quantize(tick)
+                size = (reference.equity * reference.leverage / entry // lot) * lot
+                price = Decimal(current).quantize(tick)
+                pnl = (price - entry) * size
+                if side == MarginPosition.Side.SHORT:
+                    pnl = -pnl
+                self.assertEqual(
+                    backend.amount_value(position.position_evaluation(current)),
+                    reference.equity + pnl,
+                )
+
+    def test_portfolio_api_is_backend_independent(self):
+        results = {}
+        for backend in ("decimal", "float", "fixed"):
+            portfolio = Portfolio(initial_capital=100, backend=backend, sz_decimals=5)
+            actions = [
+                portfolio.long("BTC", 10, 50000, None, leverage=5)[0],
+                portfolio.long("BTC", 10, 50100, None, leverage=5)[0],
+                portfolio.short("BTC", 10, 50500, None, leverage=5)[0],
+                portfolio.short("BTC", 10, 50400, None, leverage=5)[0],
+            ]
+            results[backend] = (actions, float(portfolio.cash))
+        self.assertEqual(results["float"][0], results["decimal"][0])
+        self.assertEqual(results["fixed"][0], results["decimal"][0])
+        self.assertAlmostEqual(results["float"][1], results["decimal"][1], places=9)
+        # fixed sizes are whole lots of 0.00001 BTC
+        self.assertAlmostEqual(results["fixed"][1], results["decimal"][1], delta=0.01)
+
+    def test_fixed_is_faster_than_decimal(self):
+        def best_time(backend):
+            position = MarginPosition("X", 50000.5, 10, MarginPosition.Side.LONG, 20, 0.5, backend=backend)
+            times = []
+            for _ in range(3):
+                start = time.perf_counter()
+                for _ in range(10000):
+                    position.position_evaluation(49712.25)
+                    position.should_stop_loss(49712.25)
+                times.append(time.perf_counter() - start)
+            return min(times)
+
+        self.assertLess(best_time(FixedPointBackend(sz_decimals=5)), best_time(DECIMAL))
+
+    def test_fixed_portfolio_needs_valid_sz_decimals(self):
+        for sz_decimals in (None, 9, {"BTC": 9}):
+            with self.assertRaises(ValueError):
+                Portfolio(initial_capital=100, backend="fixed", sz_decimals=sz_decimals)
+        portfolio = Portfolio(initial_capital=100, backend="fixed", sz_decimals={"BTC": 5})
+        with self.assertRaises(ValueError):
+            portfolio.long("ETH", 10, 2000, None)
+        # lacking cash only skips the order
+        action, position = portfolio.long("BTC", 1000, 50000, None)
+        self.assertIsNone(action)
+        self.assertEqual(position.quantity, 0.02)
+
+
 if __name__ == '__main__':
     unittest.main()
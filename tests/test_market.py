@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from helpers import make_snapshot
+from models.market import Coin, Market, MarketData
+
+
+class TestMarketColumns(unittest.TestCase):
+    def setUp(self):
+        self.res = make_snapshot(["BTC", "ETH", "ILLIQ"], 100.0)
+        self.res[1][1]["impactPxs"] = None
+        self.res[0]["universe"][2]["onlyIsolated"] = True
+
+    def reference_df(self):
+        coins = []
+        for u, m in zip(self.res[0]["universe"], self.res[1]):
+            coins.append(Coin(u["maxLeverage"], u["name"], u["onlyIsolated"], u["szDecimals"], MarketData(**m)))
+        return pd.DataFrame([coin.to_series() for coin in coins])
+
+    def test_to_df_matches_per_coin_series(self):
+        market = Market.from_response(self.res)
+        self.assertIsNone(market._coins)
+        df = market.to_df()
+        pd.testing.assert_frame_equal(df, self.reference_df())
+        self.assertEqual(df["szDecimals"].dtype, np.int64)
+        self.assertTrue(np.isnan(df["midPx"].iloc[2]))
+
+    def test_coin_views(self):
+        market = Market.from_response(self.res)
+        self.assertEqual(market.get_coin("ETH")["marketData"]["markPx"], "100.0")
+        self.assertEqual(list(market.coins), ["BTC", "ETH", "ILLIQ"])
+
+        # objects rebuilt from columns, and columns rebuilt from objects
+        from_columns = Market.from_columns(market.columns)
+        self.assertTrue(from_columns.coins["ILLIQ"].onlyIsolated)
+        self.assertIsNone(from_columns.coins["ETH"].marketData.impactPxs)
+        pd.testing.assert_frame_equal(Market(from_columns.coins).to_df(), market.to_df())
+        pd.testing.assert_frame_equal(Market.from_dict(market.to_dict()).to_df(), market.to_df())
+
+
+class TestSchemaSerialization(unittest.TestCase):
+    def setUp(self):
+        self.coin = Market.from_response(make_snapshot(["BTC"], 100.0)).coins["BTC"]
+
+    def test_to_dict_matches_reflection(self):
+        reflected = {field: getattr(self.coin, field) for field in Coin.FIELDS}
+        reflected["marketData"] = {
+            field: getattr(self.coin.marketData, field) for field in MarketData.FIELDS
+        }
+        self.assertEqual(self.coin.to_dict(), reflected)
+        flat = self.coin.to_dict(flatten=True)
+        self.assertEqual(flat["marketData_markPx"], "100.0")
+        self.assertEqual(list(flat)[:4], ["maxLeverage", "name", "onlyIsolated", "szDecimals"])
+
+    def test_msgpack_round_trip(self):
+        decoded = Coin.from_msgpack(self.coin.to_msgpack())
+        self.assertEqual(decoded.to_dict(), self.coin.to_dict())
+        self.assertIsInstance(decoded.marketData, MarketData)
+        self.assertFalse(hasattr(decoded, "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+
+import msgpack
+import numpy as np
+
+from helpers import make_snapshot
+from models.marketlog import LOG_FIELDS, MarketLog
+
+
+
+class FakeInfo:
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, path, payload):
+        self.calls += 1
+        return make_snapshot(["BTC", "ETH"], 100 + self.calls)
+
+
+class TestMarketLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = MarketLog(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_range(self):
+        for i in range(10):
+            names = ["BTC", "ETH"] if i < 5 else ["BTC", "ETH", "ILLIQ"]
+            self.log.append(make_snapshot(names, 100 + i), ts=1000 * i)
+        self.assertEqual(len(self.log), 10)
+
+        ts, coins, values = self.log.load(3000, 7000)
+        np.testing.assert_array_equal(ts, [3000, 4000, 5000, 6000])
+        self.assertEqual(coins, ["BTC", "ETH", "ILLIQ"])
+        self.assertEqual(values.shape, (4, 3, len(LOG_FIELDS)))
+        mark = LOG_FIELDS.index("markPx")
+        np.testing.assert_array_equal(values[:, 0, mark], [103, 104, 105, 106])
+        # ILLIQ is absent before 5000 and has no mid price
+        self.assertTrue(np.isnan(values[:2, 2]).all())
+        self.assertTrue(np.isnan(values[2:, 2, LOG_FIELDS.index("midPx")]).all())
+        self.assertEqual(values[3, 2, LOG_FIELDS.index("impactAskPx")], float(str(106 * 1.001)))
+
+        ts, coins, values = self.log.load()
+        self.assertEqual(len(ts), 10)
+        self.assertEqual(len(self.log.load(20000)[0]), 0)
+
+    def test_orphan_frames_are_skipped(self):
+        orphan = msgpack.packb({"ts": 1500, "coins": ["BTC"], "values": np.zeros(len(LOG_FIELDS)).tobytes()})
+        self.log.append(make_snapshot(["BTC"], 100), ts=1000)
+        # crashes between the log and the index write: a whole frame, then half of one
+        with open(self.log.log_path, "ab") as log:
+            log.write(orphan)
+        self.log.append(make_snapshot(["BTC"], 102), ts=2000)
+        with open(self.log.log_path, "ab") as log:
+            log.write(orphan[: len(orphan) // 2])
+
+        ts, coins, values = self.log.load()
+        np.testing.assert_array_equal(ts, [1000, 2000])
+        np.testing.assert_array_equal(values[:, 0, LOG_FIELDS.index("markPx")], [100, 102])
+        self.log.append(make_snapshot(["BTC"], 103), ts=3000)
+        np.testing.assert_array_equal(self.log.load(2000)[2][:, 0, LOG_FIELDS.index("markPx")], [102, 103])
+
+        index = self.log.index()
+        index["ts"][1] = 1999
+        index.tofile(self.log.index_path)
+        with self.assertRaises(ValueError):
+            self.log.load()
+
+    def test_record(self):
+        info = FakeInfo()
+        self.assertEqual(self.log.record(info, every=0, count=3), 3)
+        ts, coins, values = self.log.load()
+        self.assertEqual(coins, ["BTC", "ETH"])
+        np.testing.assert_array_equal(values[:, 1, LOG_FIELDS.index("markPx")], [101, 102, 103])
+
+
+if __name__ == "__main__":
+    unittest.main()
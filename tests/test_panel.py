@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from helpers import BAR, MINUTE, START, make_response
+from models.candles import CandleList
+from models.panel import Panel
+from models.preprocess import align
+from models.store import CandleStore
+
+
+class TestPanel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.tmp.name + "/candles")
+        self.frames = {}
+        for i, symbol in enumerate(["BTC", "ETH", "NEW"]):
+            response = make_response(START, 100, symbol=symbol, seed=i)
+            if symbol == "ETH":
+                del response[40:45]  # gap
+            if symbol == "NEW":
+                response = response[60:]  # listed later
+            candles = CandleList.from_response(response)
+            candles.to_store(self.store)
+            self.frames[symbol] = candles.to_df()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_alignment_and_mask(self):
+        panel = Panel.from_store(
+            ["BTC", "ETH", "NEW"],
+            "15m",
+            START,
+            START + 100 * BAR,
+            path=self.tmp.name + "/panel",
+            store=self.store,
+        )
+        self.assertEqual(panel.shape, (3, 100, 5))
+        self.assertEqual(panel.mask.sum(axis=1).tolist(), [100, 95, 40])
+        self.assertTrue(np.isnan(panel.symbol("ETH")[40:45]).all())
+        np.testing.assert_array_equal(panel.field("close")[2, 60:], self.frames["NEW"]["close"])
+        self.assertEqual(panel.times[1] - panel.times[0], BAR)
+
+        in_memory = Panel.from_frames(self.frames, "15m")
+        np.testing.assert_array_equal(in_memory.values, panel.values)
+        np.testing.assert_array_equal(in_memory.mask, panel.mask)
+
+    def test_memory_mapped_views(self):
+        path = self.tmp.name + "/panel"
+        Panel.from_store(["BTC", "ETH"], "15m", START, START + 100 * BAR, path=path, store=self.store)
+        panel = Panel.open(path)
+        self.assertIsInstance(panel.values, np.memmap)
+        self.assertFalse(panel.values.flags.writeable)
+
+        window = panel.time_slice(START + 10 * BAR, START + 20 * BAR)
+        self.assertEqual(window.shape, (2, 10, 5))
+        self.assertTrue(np.shares_memory(window.values, panel.values))
+        self.assertTrue(np.shares_memory(panel.field("close"), panel.values))
+
+        frame = panel.to_frame()
+        self.assertEqual(len(frame), 195)
+        self.assertEqual(list(frame.columns[:2]), ["symbol", "datetime"])
+        self.assertEqual(frame["datetime"].iloc[0].value // 10**6, START)
+
+
+class TestPreprocess(unittest.TestCase):
+    def setUp(self):
+        self.frames = {}
+        for i, symbol in enumerate(["BTC", "ETH", "NEW", "DUP", "OFF"]):
+            response = make_response(START, 100, symbol=symbol, seed=i)
+            if symbol == "ETH":
+                del response[70]
+                del response[40:45]
+            if symbol == "NEW":
+                response = response[60:]
+            if symbol == "DUP":
+                response.insert(50, dict(response[49], c="999"))
+            self.frames[symbol] = CandleList.from_response(response).to_df()
+        self.frames["OFF"].loc[3, "tic"] += MINUTE
+
+    def test_quality_report(self):
+        panel, report = align(self.frames, "15m")
+        self.assertEqual(panel.shape, (5, 100, 5))
+        self.assertEqual(report.loc["ETH", ["bars", "missing", "gaps", "longest_gap"]].tolist(), [94, 6, 2, 5])
+        self.assertEqual(report.loc["NEW", ["leading", "missing"]].tolist(), [60, 0])
+        self.assertEqual(report.loc["NEW", "first"].value // 10**6, START + 60 * BAR)
+        self.assertEqual(report.loc["DUP", ["rows", "duplicates", "bars"]].tolist(), [101, 1, 100])
+        self.assertEqual(report.loc["OFF", ["off_grid", "missing"]].tolist(), [1, 1])
+        self.assertEqual(report["dropped"].sum(), 0)
+        # the last of duplicated bars is kept
+        self.assertEqual(panel.field("close")[3, 49], 999)
+
+    def test_fill_and_drop(self):
+        panel, report = align(self.frames, "15m", fill="ffill", max_missing=0.1)
+        self.assertEqual(panel.symbols, ["BTC", "ETH", "DUP", "OFF"])
+        self.assertTrue(report.loc["NEW", "dropped"])
+        self.assertEqual(report.loc["ETH", "filled"], 6)
+        self.assertTrue(panel.mask.all())
+
+        eth = panel.symbol("ETH")
+        np.testing.assert_array_equal(eth[40:45, :4], np.full((5, 4), eth[39, 3]))
+        np.testing.assert_array_equal(eth[40:45, 4], 0)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            align(self.frames, "15m", fill="interpolate")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+from helpers import make_candles
+from models.backtesting.marginPosition import MarginPosition
+from models.backtesting.portfolio import Portfolio
+from models.backtesting.positionBook import PositionBook
+from models.backtesting.snapshot import BarSnapshot
+
+
+class TestMultiSymbolPortfolio(unittest.TestCase):
+    def setUp(self):
+        self.symbols = [f"COIN{i}" for i in range(12)]
+        self.bars = make_candles(n=5, seed=0, symbols=self.symbols)
+        self.portfolio = Portfolio(initial_capital=10_000)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, symbol in enumerate(self.symbols):
+                side = self.portfolio.long if i % 2 else self.portfolio.short
+                price = self.bars["close"].iloc[i]
+                side(symbol, 100, price, None, leverage=5)
+                side(symbol, 50, price * 1.01, None, leverage=2)
+
+    def reference_evaluation(self, row, col):
+        value = self.portfolio.cash
+        for symbol, positions in self.portfolio.holdings.items():
+            price = row.loc[row["symbol"] == symbol, col].values[0]
+            for position in positions:
+                value += position.position_evaluation(price)
+        return float(value)
+
+    def test_evaluate_matches_per_position_reference(self):
+        current_row = self.bars.iloc[-len(self.symbols) :].sample(frac=1, random_state=0)
+        row = self.portfolio.evaluate_portfolio(current_row)
+        for col in ["open", "high", "low", "close"]:
+            self.assertAlmostEqual(
+                row[col], self.reference_evaluation(current_row, col), places=6
+            )
+
+    def test_iter_frame_groups_bars(self):
+        snapshots = list(BarSnapshot.iter_frame(self.bars, self.portfolio.symbols))
+        self.assertEqual(len(snapshots), 5)
+        last = self.bars.iloc[-len(self.symbols) :]
+        ids = [self.portfolio.symbols.ids[s] for s in last["symbol"]]
+        np.testing.assert_array_equal(
+            snapshots[-1].ohlc[ids], last[["open", "high", "low", "close"]].to_numpy()
+        )
+
+    def test_missing_symbol_raises(self):
+        current_row = self.bars.iloc[-len(self.symbols) : -1]
+        with self.assertRaises(KeyError):
+            self.portfolio.evaluate_portfolio(current_row)
+
+
+class TestPositionBook(unittest.TestCase):
+    def position(self, side=MarginPosition.Side.LONG, price=100, equity=10):
+        return MarginPosition("BTC", price, equity, side, leverage=5, stop_loss_percentage=0.5)
+
+    def test_slots_are_reused(self):
+        book = PositionBook(capacity=2)
+        slots = [book.open(0, self.position()) for _ in range(3)]
+        self.assertEqual(slots, [0, 1, 2])
+        book.close(1)
+        self.assertEqual(book.open(0, self.position()), 1)
+        self.assertEqual(book.length, 3)
+        self.assertEqual(len(book), 3)
+        self.assertEqual(book.slots(0), [0, 2, 1])
+
+    def test_view_matches_position_and_goes_stale(self):
+        book = PositionBook()
+        position = self.position(side=MarginPosition.Side.SHORT)
+        view = book.view(book.open(3, position))
+        for price in [80, 100, 111]:
+            self.assertEqual(view.position_evaluation(price), position.position_evaluation(price))
+            self.assertEqual(
+                book.evaluation(view.slot, price),
+                (position.position_evaluation(price), position.should_stop_loss(price)),
+            )
+        # 5x short from 100 loses half its equity at 110
+        self.assertAlmostEqual(view.stop_price, 110)
+        closed = book.close(view.slot)
+        self.assertEqual(closed.size, position.size)
+        with self.assertRaises(ValueError):
+            view.equity
+
+    def test_stop_candidates_match_full_scan(self):
+        rng = np.random.default_rng(3)
+        book = PositionBook()
+        for i in range(200):
+            side = MarginPosition.Side.LONG if i % 3 else MarginPosition.Side.SHORT
+            position = MarginPosition(
+                f"C{i % 4}",
+                rng.uniform(90, 110),
+                10,
+                side,
+                leverage=int(rng.integers(1, 20)),
+                stop_loss_percentage=rng.uniform(0, 0.9),
+            )
+            book.open(i % 4, position)
+        for slot in rng.choice(200, 50, replace=False):
+            book.close(slot)
+        for _ in range(20):
+            low = rng.uniform(80, 100)
+            high = low + rng.uniform(0, 20)
+            for symbol_id in range(4):
+                expected = [
+                    slot
+                    for slot in book.slots(symbol_id)
+                    if book.evaluation(slot, low if book.side[slot] > 0 else high)[1]
+                ]
+                triggered = [
+                    slot
+                    for slot in book.stop_candidates(symbol_id, low, high)
+                    if book.evaluation(slot, low if book.side[slot] > 0 else high)[1]
+                ]
+                self.assertEqual(triggered, expected)
+
+    def test_portfolio_closes_first_opposite_position(self):
+        portfolio = Portfolio(initial_capital=100)
+        with contextlib.redirect_stdout(io.StringIO()):
+            portfolio.short("BTC", 10, 100, None)
+            portfolio.short("BTC", 20, 100, None)
+            action, position = portfolio.long("BTC", 10, 90, None)
+        self.assertEqual(position.equity, 10)
+        self.assertEqual([p.equity for p in portfolio.holdings["BTC"]], [20])
+        self.assertEqual(portfolio.cash, 100 - 30 + 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from models.ranking import CrossSectionalRanker, rank_rows
+
+
+def make_frame(n_times=40, n_symbols=12, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2024-01-01", periods=n_times, freq="15min")
+    df = pd.DataFrame(
+        {
+            "start_time": np.repeat(times, n_symbols),
+            "symbol": np.tile([f"C{i}" for i in range(n_symbols)], n_times),
+            # few distinct values, to have ties
+            "momentum": rng.integers(0, 6, n_times * n_symbols).astype(float),
+            "variance": rng.random(n_times * n_symbols),
+        }
+    ).set_index("symbol")
+    # symbols missing some bars
+    return df.iloc[np.sort(rng.permutation(len(df))[: int(len(df) * 0.9)])]
+
+
+class TestRankRows(unittest.TestCase):
+    def test_matches_pandas_rank(self):
+        rng = np.random.default_rng(1)
+        values = rng.integers(0, 4, (50, 9)).astype(float)
+        values[rng.random(values.shape) < 0.2] = np.nan
+        for ascending in (True, False):
+            np.testing.assert_allclose(
+                rank_rows(values, ascending=ascending),
+                pd.DataFrame(values).rank(axis=1, ascending=ascending).to_numpy(),
+            )
+
+
+class TestCrossSectionalRanker(unittest.TestCase):
+    def setUp(self):
+        self.df = make_frame()
+        self.metrics = {"momentum": False, "variance": True}
+
+    def expected(self, df):
+        """The rank_column / prepare_data notebook ranking."""
+        expected = df.copy()
+        for metric, ascending in self.metrics.items():
+            expected[f"rank_{metric}"] = expected.groupby("start_time")[metric].rank(ascending=ascending)
+        expected["average_rank"] = (expected["rank_momentum"] + expected["rank_variance"]) / 2
+        return expected.reset_index().set_index(["start_time", "symbol"]).sort_index()
+
+    def test_incremental_matches_groupby_rank(self):
+        ranker = CrossSectionalRanker(self.metrics)
+        times = self.df["start_time"].unique()
+        self.assertEqual(ranker.add_frame(self.df[self.df["start_time"] < times[15]]), 15)
+        # rows already ranked are skipped
+        self.assertEqual(ranker.add_frame(self.df), len(times) - 15)
+        self.assertEqual(ranker.add_frame(self.df), 0)
+
+        ranks = ranker.to_frame().set_index(["start_time", "symbol"]).sort_index()
+        expected = self.expected(self.df)[ranker.columns]
+        pd.testing.assert_frame_equal(ranks, expected, check_names=False)
+
+    def test_top_and_bottom(self):
+        ranker = CrossSectionalRanker(self.metrics)
+        ranker.add_frame(self.df)
+        last = self.df["start_time"].max()
+        latest = self.expected(self.df).loc[last, "average_rank"].sort_values(kind="stable")
+        self.assertEqual(ranker.latest().to_dict(), latest.to_dict())
+        self.assertEqual(ranker.top(3), latest.index[:3].tolist())
+        self.assertEqual(ranker.bottom(2), latest.index[::-1][:2].tolist())
+
+    def test_add_one_bar(self):
+        ranker = CrossSectionalRanker(self.metrics, symbols=["A", "B", "C"])
+        ranker.add(1, {"momentum": [3.0, 1.0, np.nan], "variance": [0.1, 0.2, 0.3]})
+        np.testing.assert_array_equal(ranker.ranks("rank_variance").to_numpy(), [[1.0, 2.0, 3.0]])
+        self.assertEqual(ranker.top(5), ["A", "B"])
+        with self.assertRaises(ValueError):
+            ranker.add(1, {"momentum": [1.0, 2.0, 3.0], "variance": [1.0, 2.0, 3.0]})
+
+
+if __name__ == "__main__":
+    unittest.main()
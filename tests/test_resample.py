@@ -0,0 +1,119 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from constants.intervals import bar_open, interval_ms
+from helpers import MINUTE, START, make_response
+from models.candles import decode_candles
+from models.panel import Panel
+from models.preprocess import align
+from models.resample import Resampler, resample, resample_store
+from models.store import CandleStore
+
+# 7 minutes early, so that the first bars are partial
+START = START - 7 * MINUTE
+
+
+def make_minutes(n=1000):
+    columns = decode_candles(make_response(START, n, interval_ms=MINUTE))
+    keep = np.ones(n, dtype=bool)
+    keep[100:130] = False  # a gap
+    return {col: values[keep] for col, values in columns.items()}
+
+
+class TestResample(unittest.TestCase):
+    def setUp(self):
+        self.minutes = make_minutes()
+
+    def test_matches_pandas_resample(self):
+        df = pd.DataFrame(self.minutes, index=pd.to_datetime(self.minutes["t"], unit="ms"))
+        for interval, rule in (("15m", "15min"), ("1h", "1h"), ("4h", "4h")):
+            expected = df.resample(rule).agg(
+                {"o": "first", "h": "max", "l": "min", "c": "last", "v": "sum", "n": "sum"}
+            ).dropna()
+            bars = resample(self.minutes, "1m", interval)
+            np.testing.assert_array_equal(bars["t"], expected.index.asi8 // 10**6)
+            np.testing.assert_array_equal(bars["T"] - bars["t"], interval_ms(interval) - 1)
+            for col in "ohlcvn":
+                np.testing.assert_allclose(bars[col], expected[col], rtol=1e-12, err_msg=f"{interval} {col}")
+            self.assertEqual(bars["n"].dtype, np.int64)
+
+    def test_weeks_open_on_monday(self):
+        self.assertEqual(pd.Timestamp(bar_open(START, "1w"), unit="ms").day_name(), "Monday")
+        with self.assertRaises(ValueError):
+            resample(self.minutes, "15m", "1m")
+
+    def test_weeks_align_onto_the_grid(self):
+        hours = decode_candles(make_response(START - 7 * MINUTE * 60, 24 * 7 * 9, interval_ms=MINUTE * 60))
+        weeks = resample(hours, "1h", "1w")
+        df = pd.DataFrame(
+            {"tic": weeks["t"], "open": weeks["o"], "high": weeks["h"], "low": weeks["l"],
+             "close": weeks["c"], "volume": weeks["v"]}
+        )
+        panel, report = align({"X": df}, "1w")
+        self.assertEqual(report.loc["X", "off_grid"], 0)
+        self.assertEqual(report.loc["X", "bars"], len(df))
+        self.assertEqual(report.loc["X", "coverage"], 1.0)
+        np.testing.assert_array_equal(panel.times, weeks["t"])
+        np.testing.assert_array_equal(Panel.from_frames({"X": df}, "1w").mask, [[True] * len(df)])
+
+    def test_incremental_matches_batch(self):
+        resampler = Resampler("1m", ("15m", "1h", "4h"))
+        finished = {target: [] for target in resampler.targets}
+        for i in range(len(self.minutes["t"])):
+            candle = {col: values[i] for col, values in self.minutes.items()}
+            if i % 7 == 0:
+                # the API revises the latest candle until it closes
+                revised = dict(candle, h=candle["h"] * 2, v=99.0, n=5)
+                for target, bars in resampler.update(revised).items():
+                    finished[target].append(bars)
+            for target, bars in resampler.update(candle).items():
+                finished[target].append(bars)
+
+        for target in resampler.targets:
+            expected = resample(self.minutes, "1m", target)
+            for col, values in expected.items():
+                np.testing.assert_allclose(np.concatenate([bars[col] for bars in finished[target]]), values[:-1])
+                np.testing.assert_allclose(resampler.current(target)[col], values[-1])
+
+    def test_batches(self):
+        resampler = Resampler("1m", ("4h",))
+        finished = [
+            resampler.update({col: values[i : i + 333] for col, values in self.minutes.items()})["4h"]
+            for i in range(0, len(self.minutes["t"]), 333)
+        ]
+        expected = resample(self.minutes, "1m", "4h")
+        np.testing.assert_allclose(np.concatenate([bars["c"] for bars in finished]), expected["c"][:-1])
+        with self.assertRaises(ValueError):
+            resampler.update({col: values[:1] for col, values in self.minutes.items()})
+
+
+class TestResampleStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.tmp.name)
+        self.minutes = make_minutes()
+        self.store.append("BTC", "1m", self.minutes)
+        self.end = int(self.minutes["t"][-1]) + MINUTE
+        self.store.add_coverage("BTC", "1m", START, self.end)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_whole_bars_in_coverage(self):
+        self.assertEqual(resample_store(self.store, "BTC", "1m", "1h"), 16)
+        first, last = START + 7 * MINUTE, bar_open(self.end, "1h")
+        self.assertEqual(self.store.coverage("BTC", "1h"), [[first, last]])
+
+        columns = self.store.read("BTC", "1h")
+        expected = resample(self.minutes, "1m", "1h")
+        inside = (expected["t"] >= first) & (expected["t"] < last)
+        for col, values in expected.items():
+            np.testing.assert_array_equal(columns[col], values[inside])
+        self.assertEqual(self.store.missing("BTC", "1h", first, last), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
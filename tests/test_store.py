@@ -0,0 +1,120 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from models.candles import CandleList
+from helpers import MINUTE, make_response
+from models.store import CandleStore, CANDLE_DTYPES, merge_spans, missing_spans
+
+
+class TestCandleStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.tmp.name)
+        # 2024-01-31 12:00 UTC, 200 bars run into February
+        self.start = 1706702400000
+        self.candles = CandleList.from_response(make_response(self.start, 200))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_across_partitions(self):
+        self.candles.to_store(self.store)
+        self.assertEqual(self.store.partitions("BTC", "15m"), ["2024-01", "2024-02"])
+        columns = self.store.read("BTC", "15m")
+        expected = self.candles.columns
+        for col, dtype in CANDLE_DTYPES.items():
+            self.assertEqual(columns[col].dtype, dtype)
+            np.testing.assert_array_equal(columns[col], expected[col])
+
+    def test_append_replaces_duplicates(self):
+        self.candles.to_store(self.store)
+        update = CandleList.from_response(make_response(self.start + 150 * 15 * MINUTE, 100, seed=1))
+        update.to_store(self.store)
+
+        columns = self.store.read("BTC", "15m")
+        self.assertEqual(len(columns["t"]), 250)
+        self.assertTrue((np.diff(columns["t"]) == 15 * MINUTE).all())
+        np.testing.assert_array_equal(columns["c"][150:], update.columns["c"])
+
+    def test_range_read(self):
+        self.candles.to_store(self.store)
+        start = self.start + 40 * 15 * MINUTE
+        end = self.start + 90 * 15 * MINUTE
+        df = self.store.read_df("BTC", "15m", start, end)
+        self.assertEqual(len(df), 50)
+        self.assertEqual(df["tic"].iloc[0], start)
+        self.assertEqual(df["datetime"].dtype, "datetime64[ns]")
+        self.assertEqual(df["close"].dtype, "float64")
+        self.assertEqual(len(self.store.read("BTC", "15m", end=self.start)["t"]), 0)
+        self.assertEqual(
+            self.store.span("BTC", "15m"), (self.start, self.start + 199 * 15 * MINUTE)
+        )
+
+
+class FakeInfo:
+    """candles_snapshot over a fixed 15m history, at most `limit` bars per call."""
+
+    def __init__(self, start, n, limit=5000):
+        self.response = make_response(start, n)
+        self.limit = limit
+        self.calls = []
+
+    def candles_snapshot(self, symbol, interval, start, end):
+        self.calls.append((start, end))
+        rows = [c for c in self.response if start <= c["t"] <= end]
+        return rows[: self.limit]
+
+
+class TestSaveFetch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.tmp.name)
+        self.start = 1706702400000
+        self.info = FakeInfo(self.start, 1000, limit=300)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def bar(self, i):
+        return self.start + i * 15 * MINUTE
+
+    def save_fetch(self, first, last):
+        return CandleList.save_fetch(
+            self.info, "BTC", "15m", self.bar(first), self.bar(last), store=self.store
+        )
+
+    def test_fetches_only_missing_spans(self):
+        candles = self.save_fetch(100, 400)
+        self.assertEqual(candles.number_of_candles, 300)
+        self.assertEqual(len(self.info.calls), 1)
+
+        self.info.calls.clear()
+        self.assertEqual(self.save_fetch(150, 250).number_of_candles, 100)
+        self.assertEqual(self.info.calls, [])
+
+        candles = self.save_fetch(0, 900)
+        # [0, 100) in one call, [400, 900) in two pages of at most 300 bars
+        self.assertEqual(
+            self.info.calls,
+            [
+                (self.bar(0), self.bar(100) - 1),
+                (self.bar(400), self.bar(900) - 1),
+                (self.bar(700), self.bar(900) - 1),
+            ],
+        )
+        t = candles.columns["t"]
+        np.testing.assert_array_equal(t, [self.bar(i) for i in range(900)])
+        expected = [float(c["c"]) for c in self.info.response[:900]]
+        np.testing.assert_array_equal(candles.columns["c"], expected)
+        self.assertEqual(self.store.coverage("BTC", "15m"), [[self.bar(0), self.bar(900)]])
+
+    def test_spans(self):
+        self.assertEqual(merge_spans([[5, 8], [0, 2], [2, 3], [7, 9]]), [[0, 3], [5, 9]])
+        self.assertEqual(missing_spans(1, 10, [[0, 3], [5, 9]]), [[3, 5], [9, 10]])
+        self.assertEqual(missing_spans(1, 10, []), [[1, 10]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+from hyperliquid.utils import constants as hl_constants
+
+from constants.intervals import bar_open, interval_ms
+from models.candles import decode_candles
+from models.store import CandleStore
+
+# candleSnapshot returns at most this many bars per request
+MAX_BARS = 5000
+
+
+def page_spans(start, end, interval, max_bars=MAX_BARS):
+    """Split [start, end) into [start, end) pages of at most max_bars bars."""
+    step = interval_ms(interval) * max_bars
+    return [[s, min(s + step, end)] for s in range(start, end, step)]
+
+
+class TokenBucket:
+    """
+    Rate limit shared by the concurrent requests: `rate` tokens per second,
+    at most `capacity` banked for bursts.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CandleDownloader:
+    """
+    Download candles of many symbols concurrently into the candle store.
+
+    Ranges are split into pages of at most max_bars bars, and only the
+    spans the store has not covered yet are requested. Every request waits
+    for a token of the shared bucket (the /info limit is by weight per
+    minute, one candleSnapshot is ~20 of 1200), failed requests are retried
+    with exponential backoff, and each page is written to the store as soon
+    as it arrives.
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        base_url=hl_constants.MAINNET_API_URL,
+        store: CandleStore = None,
+        rate=1.0,
+        burst=5,
+        concurrency=8,
+        retries=3,
+        backoff=0.5,
+        timeout=10.0,
+        max_bars=MAX_BARS,
+    ):
+        self.base_url = base_url
+        self.store = store or CandleStore()
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_bars = max_bars
+
+    async def fetch_page(self, client, symbol, interval, start, end):
+        """The raw candles of one page, start <= t < end."""
+        import httpx
+
+        payload = {
+            "type": "candleSnapshot",
+            "req": {"coin": symbol, "interval": interval, "startTime": start, "endTime": end - 1},
+        }
+        for attempt in range(self.retries + 1):
+            await self._bucket.acquire()
+            async with self._semaphore:
+                try:
+                    response = await client.post("/info", json=payload)
+                    if response.status_code not in self.RETRY_STATUS:
+                        response.raise_for_status()
+                        return response.json()
+                    error = httpx.HTTPStatusError(
+                        f"{response.status_code} for {symbol} {interval}",
+                        request=response.request,
+                        response=response,
+                    )
+                except httpx.TransportError as e:
+                    error = e
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2**attempt)
+        raise error
+
+    async def download_symbol(self, client, symbol, interval, start, end):
+        """Fetch the missing pages of one symbol into the store, returns the bar count."""
+        # bars opening from here on are not closed yet, fetch them again next time
+        closed = bar_open(int(time.time() * 1000), interval)
+        pages = [
+            page
+            for gap_start, gap_end in self.store.missing(symbol, interval, start, end)
+            for page in page_spans(gap_start, gap_end, interval, self.max_bars)
+        ]
+
+        step = interval_ms(interval)
+
+        async def fetch(page_start, page_end):
+            # follow up when the response stops short of the page (an API
+            # cap below max_bars), like CandleList.fetch_columns
+            rows = 0
+            start = page_start
+            while start < page_end:
+                columns = decode_candles(await self.fetch_page(client, symbol, interval, start, page_end))
+                if not len(columns["t"]):
+                    break
+                rows += self.store.append(symbol, interval, columns)
+                next_start = int(columns["t"][-1]) + step
+                if next_start <= start:
+                    break
+                start = next_start
+            if min(page_end, closed) > page_start:
+                self.store.add_coverage(symbol, interval, page_start, min(page_end, closed))
+            return rows
+
+        return sum(await asyncio.gather(*(fetch(*page) for page in pages)))
+
+    async def download(self, symbols, interval, start, end):
+        """
+        Download every symbol over [start, end).
+        Returns {symbol: bars fetched}, or the exception for a symbol that failed.
+        """
+        # httpx is imported here rather than at the top of the module, it
+        # takes longer to import than the rest of the package
+        import httpx
+
+        self._bucket = TokenBucket(self.rate, self.burst)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as client:
+            results = await asyncio.gather(
+                *(self.download_symbol(client, symbol, interval, start, end) for symbol in symbols),
+                return_exceptions=True,
+            )
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                print(f"Failed to download {symbol} {interval}: {result}")
+        return dict(zip(symbols, results))
+
+
+def download_candles(symbols, interval, start, end, **kwargs):
+    """Run CandleDownloader(**kwargs).download(...) to completion."""
+    return asyncio.run(CandleDownloader(**kwargs).download(symbols, interval, start, end))
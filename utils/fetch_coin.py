@@ -1,12 +1,23 @@
 import time
-from hyperliquid.info import Info
+from functools import lru_cache
 from hyperliquid.utils import constants as hl_constants
 import utils.now_timestamp as now_timestamp 
 import models.candles as candles
-import importlib
-importlib.reload(candles)
-importlib.reload(now_timestamp)
-info = Info(hl_constants.MAINNET_API_URL, skip_ws=True)
+from constants.intervals import interval_ms
+from models.store import CandleStore
+from utils.download import download_candles
+
+
+@lru_cache(maxsize=None)
+def make_info(base_url=hl_constants.MAINNET_API_URL):
+    """
+    A REST-only hyperliquid Info client, built on first use and shared per
+    base_url. The sdk is imported here so that importing this module does
+    no network setup.
+    """
+    from hyperliquid.info import Info
+
+    return Info(base_url, skip_ws=True)
 
 
 def _bar_count_to_start_end(
@@ -14,23 +25,7 @@ def _bar_count_to_start_end(
     interval,
 ):
     end = now_timestamp.get_timestamp_from_today_midnight_utc(days=0)
-    
-    if interval == '1m':
-        start = end - 1000 * 60 * bar_count
-    elif interval == '5m':
-        start = end - 1000 * 60 * 5 * bar_count
-    elif interval == '15m':
-        start = end - 1000 * 60 * 15 * bar_count
-    elif interval == '1h':
-        start = end - 1000 * 60 * 60 * bar_count
-    elif interval == '4h':
-        start = end - 1000 * 60 * 60 * 4 * bar_count
-    elif interval == '1d':
-        start = end - 1000 * 60 * 60 * 24 * bar_count
-    elif interval == '1w':
-        start = end - 1000 * 60 * 60 * 24 * 7 * bar_count
-    else:
-        raise ValueError(f"Invalid interval: {interval}")
+    start = end - interval_ms(interval) * bar_count
 
     return start, end
 
@@ -38,13 +33,32 @@ def fetch_coin(
         coin,
         interval='15m',
         bar_count=1000,
+        info=None,
     ):
     print(coin)
+    info = info or make_info()
     start, end = _bar_count_to_start_end(bar_count, interval)
     result = info.candles_snapshot(coin, interval, start, end)
     _candles = candles.CandleList.from_response(result)
+    _candles.to_store()
     _candles.to_csv(file_name=f'{coin}_{interval}_{bar_count}.csv')
     return _candles.to_df()
 
 
+def fetch_coins(
+        coins,
+        interval='15m',
+        bar_count=1000,
+        **kwargs,
+    ):
+    """
+    Download many coins concurrently into the candle store (see
+    utils.download) and return {coin: DataFrame} of the last bar_count bars.
+    """
+    start, end = _bar_count_to_start_end(bar_count, interval)
+    store = kwargs.setdefault('store', CandleStore())
+    download_candles(coins, interval, start, end, **kwargs)
+    return {coin: store.read_df(coin, interval, start, end) for coin in coins}
+
+
 # fetch_coins_by_names(top_n_coins)
\ No newline at end of file